@@ -0,0 +1,158 @@
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 复权时需要乘以因子的价格列，成交量等其余列保持不复权
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+class AdjustmentStore:
+    """
+    不复权行情与复权因子分开存储
+
+    不复权K线按股票代码存为 bars/{symbol}.csv，后复权因子存为 factors/{symbol}.csv，
+    覆盖的日期范围等元数据存为 meta/{symbol}.json。前复权(qfq)、后复权(hfq)
+    或不复权序列在读取时由因子向量化相乘得到，除权除息后只需更新因子表，
+    无需重新下载历史K线。
+    """
+
+    def __init__(self, data_dir='data'):
+        self.data_dir = data_dir
+        for sub_dir in ['bars', 'factors', 'meta']:
+            os.makedirs(os.path.join(self.data_dir, sub_dir), exist_ok=True)
+
+    def path(self, kind, symbol, ext='csv'):
+        return os.path.join(self.data_dir, kind, f"{symbol}.{ext}")
+
+    def _write_atomic(self, path, write):
+        # 先写同目录下的临时文件再替换，避免读到写了一半的文件；临时文件名唯一，多线程/多进程同时写互不干扰
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _write_csv(self, df, path):
+        self._write_atomic(path, df.to_csv)
+
+    def load_bars(self, symbol):
+        """
+        读取不复权K线
+
+        参数:
+            symbol: 股票代码
+
+        返回:
+            pd.DataFrame: 以date为索引的不复权K线，没有缓存时返回None
+        """
+        path = self.path('bars', symbol)
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path, index_col='date', parse_dates=True)
+
+    def save_bars(self, symbol, df):
+        """
+        合并保存不复权K线，日期重复时以新数据为准
+
+        参数:
+            symbol: 股票代码
+            df: 以date为索引的不复权K线
+
+        返回:
+            pd.DataFrame: 合并后的全部K线
+        """
+        existing = self.load_bars(symbol)
+        if existing is not None:
+            df = pd.concat([existing, df])
+            df = df[~df.index.duplicated(keep='last')]
+        df = df.sort_index()
+        self._write_csv(df, self.path('bars', symbol))
+        return df
+
+    def load_factors(self, symbol):
+        """
+        读取后复权因子表
+
+        参数:
+            symbol: 股票代码
+
+        返回:
+            pd.Series: 以生效日期为索引、按日期升序的后复权因子，没有缓存时返回None
+        """
+        path = self.path('factors', symbol)
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path, index_col='date', parse_dates=True)['hfq_factor']
+
+    def save_factors(self, symbol, factors):
+        """
+        保存后复权因子表（新因子表覆盖旧表，因子表只有除权除息日对应的几十行）
+
+        参数:
+            symbol: 股票代码
+            factors: 以生效日期为索引的后复权因子序列
+
+        返回:
+            bool: 因子是否有变化
+        """
+        factors = factors.astype(float).sort_index()
+        factors.index.name = 'date'
+        factors.name = 'hfq_factor'
+        existing = self.load_factors(symbol)
+        if existing is not None and existing.index.equals(factors.index) and np.array_equal(existing.values, factors.values):
+            return False
+        self._write_csv(factors.to_frame(), self.path('factors', symbol))
+        return True
+
+    def load_meta(self, symbol):
+        """
+        读取元数据，包括已覆盖的日期范围(start/end)和因子最近检查日期(factors_checked)
+        """
+        path = self.path('meta', symbol, 'json')
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_meta(self, symbol, meta):
+        """
+        保存元数据
+        """
+        self._write_atomic(self.path('meta', symbol, 'json'), lambda f: json.dump(meta, f, ensure_ascii=False))
+
+    @staticmethod
+    def apply(bars, factors, adjust='qfq'):
+        """
+        按复权方式生成行情序列
+
+        参数:
+            bars: 以date为索引的不复权K线
+            factors: 以生效日期为索引的后复权因子，为None时视为没有除权除息
+            adjust: 'qfq' 前复权，'hfq' 后复权，'' 或 None 不复权
+
+        返回:
+            pd.DataFrame: 复权后的K线（新对象，不修改bars）
+        """
+        if adjust not in ('qfq', 'hfq', '', None):
+            raise ValueError(f"未知的复权方式: {adjust}")
+        result = bars.copy()
+        if not adjust or factors is None or len(factors) == 0:
+            return result
+
+        # 每根K线取生效日期不晚于当日的最近一个因子
+        factor_dates = factors.index.values
+        factor_values = factors.to_numpy(dtype=float)
+        pos = np.searchsorted(factor_dates, bars.index.values, side='right') - 1
+        bar_factors = np.where(pos >= 0, factor_values[np.clip(pos, 0, None)], 1.0)
+        if adjust == 'qfq':
+            # 前复权以最新因子为基准，最新价格保持不变
+            bar_factors = bar_factors / factor_values[-1]
+
+        columns = [column for column in PRICE_COLUMNS if column in result.columns]
+        result[columns] = result[columns].to_numpy(dtype=float) * bar_factors[:, None]
+        return result
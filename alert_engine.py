@@ -0,0 +1,423 @@
+import re
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 词法单元：数字、标识符（列名/函数名/关键字）、运算符
+TOKEN_PATTERN = re.compile(r'\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|[<>+\-*/(),]))')
+KEYWORDS = {'and', 'or', 'not', 'crosses', 'above', 'below'}
+COMPARE_OPS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+ARITH_OPS = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.divide,
+}
+
+
+def shift(values, n):
+    """沿时间轴（最后一维）后移n根K线，前面补NaN"""
+    if n == 0:
+        return values
+    out = np.full(values.shape, np.nan)
+    out[..., n:] = values[..., :-n]
+    return out
+
+
+def rolling(values, n, func, fill):
+    """沿时间轴的n根K线滚动窗口聚合，前n-1根填fill"""
+    out = np.full(values.shape, fill, dtype=np.result_type(values, type(fill)))
+    if values.shape[-1] >= n:
+        out[..., n - 1:] = func(sliding_window_view(values, n, axis=-1), axis=-1)
+    return out
+
+
+class Node:
+    """
+    编译后的表达式节点
+
+    属性:
+        key: 规范化的表达式文本，用于在同一次计算中复用相同子表达式
+        kind: 'num' 数值或 'bool' 布尔
+        lookback: 计算最新一根K线需要往前多看的K线数
+    """
+
+    def __init__(self, key, kind, lookback, compute, children=()):
+        self.key = key
+        self.kind = kind
+        self.lookback = lookback
+        self.compute = compute
+        self.children = children
+
+    def evaluate(self, columns, memo):
+        if self.key not in memo:
+            memo[self.key] = self.compute(*[child.evaluate(columns, memo) for child in self.children])
+        return memo[self.key]
+
+    def identifiers(self):
+        """表达式用到的列名"""
+        result = set()
+        for child in self.children:
+            result |= child.identifiers()
+        return result
+
+
+class Column(Node):
+    def __init__(self, name):
+        super().__init__(name, 'num', 0, None)
+
+    def evaluate(self, columns, memo):
+        return columns[self.key]
+
+    def identifiers(self):
+        return {self.key}
+
+
+class Number(Node):
+    def __init__(self, value):
+        super().__init__(repr(value), 'num', 0, None)
+        self.value = value
+
+    def evaluate(self, columns, memo):
+        return self.value
+
+    def identifiers(self):
+        return set()
+
+
+def _expect(node, kind, context):
+    if node.kind != kind:
+        expected = '条件表达式' if kind == 'bool' else '数值表达式'
+        raise ValueError(f"{context} 需要{expected}: {node.key}")
+    return node
+
+
+def _window_arg(node, name):
+    if not isinstance(node, Number) or node.value != int(node.value) or node.value < 1:
+        raise ValueError(f"{name} 的周期参数必须是正整数: {node.key}")
+    return int(node.value)
+
+
+def _cross(a, b, above):
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    prev_a, prev_b = shift(a, 1), shift(b, 1)
+    if above:
+        return (a > b) & (prev_a <= prev_b)
+    return (a < b) & (prev_a >= prev_b)
+
+
+def _make_function(name, args):
+    """
+    回看函数：
+        ref(x, n)      n根K线之前的x
+        highest(x, n)  最近n根K线x的最大值
+        lowest(x, n)   最近n根K线x的最小值
+        mean(x, n)     最近n根K线x的均值
+        any(c, n)      最近n根K线中条件c至少成立一次
+        all(c, n)      最近n根K线中条件c都成立
+        cross_above(a, b) / cross_below(a, b)  同 a crosses above/below b
+    """
+    key = f"{name}({', '.join(arg.key for arg in args)})"
+    if name in ('cross_above', 'cross_below'):
+        if len(args) != 2:
+            raise ValueError(f"{name} 需要2个参数")
+        a, b = [_expect(arg, 'num', name) for arg in args]
+        return Node(key, 'bool', max(a.lookback, b.lookback) + 1,
+                    lambda x, y: _cross(x, y, name == 'cross_above'), (a, b))
+    if name not in ('ref', 'highest', 'lowest', 'mean', 'any', 'all'):
+        raise ValueError(f"未知的函数: {name}")
+    if len(args) != 2:
+        raise ValueError(f"{name} 需要2个参数")
+    value, n = args[0], _window_arg(args[1], name)
+    if name == 'ref':
+        _expect(value, 'num', name)
+        return Node(key, 'num', value.lookback + n, lambda x: shift(x, n), (value,))
+    if name in ('any', 'all'):
+        _expect(value, 'bool', name)
+        func = np.any if name == 'any' else np.all
+        return Node(key, 'bool', value.lookback + n - 1, lambda c: rolling(c, n, func, False), (value,))
+    _expect(value, 'num', name)
+    func = {'highest': np.max, 'lowest': np.min, 'mean': np.mean}[name]
+    return Node(key, 'num', value.lookback + n - 1, lambda x: rolling(x, n, func, np.nan), (value,))
+
+
+class Parser:
+    """
+    规则表达式的递归下降解析器
+
+    语法（优先级由低到高）:
+        or / and / not
+        比较: < <= > >= == !=，以及 a crosses above b、a crosses below b
+        + - * /，一元负号
+        数字、列名、函数调用、括号
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    def _tokenize(self, text):
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = TOKEN_PATTERN.match(text, pos)
+            if not match:
+                raise ValueError(f"无法解析的规则: {text!r}，位置 {pos}")
+            number, name, op = match.groups()
+            if number is not None:
+                tokens.append(('num', float(number)))
+            elif name is not None:
+                tokens.append(('kw', name.lower()) if name.lower() in KEYWORDS else ('name', name))
+            else:
+                tokens.append(('op', op))
+            pos = match.end()
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _accept(self, kind, value=None):
+        token = self._peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return token
+        return None
+
+    def _require(self, kind, value):
+        if not self._accept(kind, value):
+            raise ValueError(f"规则 {self.text!r} 中缺少 {value!r}")
+
+    def parse(self):
+        node = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"规则 {self.text!r} 中有多余内容: {self.tokens[self.pos][1]!r}")
+        return _expect(node, 'bool', '规则')
+
+    def _or(self):
+        node = self._and()
+        while self._accept('kw', 'or'):
+            left, right = _expect(node, 'bool', 'or'), _expect(self._and(), 'bool', 'or')
+            node = Node(f"({left.key} or {right.key})", 'bool', max(left.lookback, right.lookback),
+                        np.logical_or, (left, right))
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._accept('kw', 'and'):
+            left, right = _expect(node, 'bool', 'and'), _expect(self._not(), 'bool', 'and')
+            node = Node(f"({left.key} and {right.key})", 'bool', max(left.lookback, right.lookback),
+                        np.logical_and, (left, right))
+        return node
+
+    def _not(self):
+        if self._accept('kw', 'not'):
+            operand = _expect(self._not(), 'bool', 'not')
+            return Node(f"(not {operand.key})", 'bool', operand.lookback, np.logical_not, (operand,))
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._additive()
+        if self._accept('kw', 'crosses'):
+            if self._accept('kw', 'above'):
+                name = 'cross_above'
+            elif self._accept('kw', 'below'):
+                name = 'cross_below'
+            else:
+                raise ValueError(f"规则 {self.text!r} 中 crosses 后面需要 above 或 below")
+            return _make_function(name, [left, self._additive()])
+        token = self._peek()
+        if token[0] == 'op' and token[1] in COMPARE_OPS:
+            self.pos += 1
+            right = self._additive()
+            _expect(left, 'num', token[1])
+            _expect(right, 'num', token[1])
+            return Node(f"({left.key} {token[1]} {right.key})", 'bool', max(left.lookback, right.lookback),
+                        COMPARE_OPS[token[1]], (left, right))
+        return left
+
+    def _additive(self):
+        node = self._term()
+        while True:
+            token = self._peek()
+            if token[0] != 'op' or token[1] not in ('+', '-'):
+                return node
+            self.pos += 1
+            node = self._arith(token[1], node, self._term())
+
+    def _term(self):
+        node = self._unary()
+        while True:
+            token = self._peek()
+            if token[0] != 'op' or token[1] not in ('*', '/'):
+                return node
+            self.pos += 1
+            node = self._arith(token[1], node, self._unary())
+
+    def _arith(self, op, left, right):
+        _expect(left, 'num', op)
+        _expect(right, 'num', op)
+        return Node(f"({left.key} {op} {right.key})", 'num', max(left.lookback, right.lookback),
+                    ARITH_OPS[op], (left, right))
+
+    def _unary(self):
+        if self._accept('op', '-'):
+            operand = _expect(self._unary(), 'num', '-')
+            if isinstance(operand, Number):
+                return Number(-operand.value)
+            return Node(f"(-{operand.key})", 'num', operand.lookback, np.negative, (operand,))
+        return self._primary()
+
+    def _primary(self):
+        token = self._peek()
+        if self._accept('num'):
+            return Number(token[1])
+        if self._accept('op', '('):
+            node = self._or()
+            self._require('op', ')')
+            return node
+        if self._accept('name'):
+            if self._accept('op', '('):
+                args = []
+                if not self._accept('op', ')'):
+                    args.append(self._or())
+                    while self._accept('op', ','):
+                        args.append(self._or())
+                    self._require('op', ')')
+                return _make_function(token[1].lower(), args)
+            return Column(token[1])
+        raise ValueError(f"规则 {self.text!r} 不完整或有语法错误")
+
+
+@lru_cache(maxsize=1024)
+def compile_rule(expression):
+    """
+    把规则表达式编译成可向量化计算的节点树（相同表达式只编译一次）
+
+    参数:
+        expression: 规则表达式，如 'MACD crosses above MACD_Signal and RSI < 40'
+
+    返回:
+        Node: 编译后的根节点，结果为布尔值
+    """
+    return Parser(expression).parse()
+
+
+class AlertEngine:
+    """
+    基于技术指标列的规则告警引擎
+
+    规则只编译一次；每次刷新后把自选股最近的K线对齐成 (股票数 x K线数) 的矩阵，
+    每条规则对所有股票做一次向量化计算，只检查新到的K线（以及可能在盘中变化的最后一根），
+    同一规则、股票、日期的告警只记录一次。
+    """
+
+    def __init__(self, history_bars=1):
+        """
+        参数:
+            history_bars: 第一次看到某只股票时检查最近多少根K线
+        """
+        self.history_bars = history_bars
+        self.rules = {}
+        self._last_seen = {}
+        self._seen_alerts = set()
+        self._log = []
+
+    def add_rule(self, name, expression):
+        """
+        添加规则
+
+        参数:
+            name: 规则名称
+            expression: 规则表达式，可使用 TechnicalIndicators 生成的列（MA5、KDJ_J、BOLL_Lower、OBV等）
+                和行情列（open、high、low、close、volume），支持 crosses above/below 以及
+                ref、highest、lowest、mean、any、all 回看函数
+        """
+        self.rules[name] = compile_rule(expression)
+
+    def remove_rule(self, name):
+        self.rules.pop(name, None)
+
+    def evaluate(self, frames):
+        """
+        对自选股计算所有规则
+
+        参数:
+            frames: {股票代码: 包含技术指标的DataFrame}
+
+        返回:
+            pd.DataFrame: 本次新产生的告警（rule、symbol、date列）
+        """
+        if not self.rules or not frames:
+            return pd.DataFrame(columns=['rule', 'symbol', 'date'])
+
+        lookback = max(rule.lookback for rule in self.rules.values())
+        needed = set().union(*[rule.identifiers() for rule in self.rules.values()])
+
+        # 每只股票需要检查的K线数：上次检查的最后一根（盘中会变化）及之后的新K线
+        symbols = []
+        new_counts = []
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            missing = needed - set(df.columns)
+            if missing:
+                raise ValueError(f"{symbol} 缺少规则需要的列: {sorted(missing)}")
+            last = self._last_seen.get(symbol)
+            if last is None:
+                count = min(self.history_bars, len(df))
+            else:
+                count = len(df) - df.index.searchsorted(last, side='left')
+            if count > 0:
+                symbols.append(symbol)
+                new_counts.append(count)
+        if not symbols:
+            return pd.DataFrame(columns=['rule', 'symbol', 'date'])
+
+        # 右对齐成矩阵，历史不足的部分补NaN
+        width = max(new_counts) + lookback
+        columns = {}
+        for name in needed:
+            matrix = np.full((len(symbols), width), np.nan)
+            for row, symbol in enumerate(symbols):
+                values = frames[symbol][name].to_numpy(dtype=float)[-width:]
+                matrix[row, width - len(values):] = values
+            columns[name] = matrix
+
+        # 同一次计算中多条规则共用子表达式
+        memo = {}
+        new_alerts = []
+        counts = np.array(new_counts)
+        checked = np.arange(width)[None, :] >= width - counts[:, None]
+        for rule_name, rule in self.rules.items():
+            # NaN比较为False即可，屏蔽除零和NaN比较的警告
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fired = np.asarray(rule.evaluate(columns, memo), dtype=bool) & checked
+            for row, col in zip(*np.nonzero(fired)):
+                symbol = symbols[row]
+                date = frames[symbol].index[len(frames[symbol]) - width + col]
+                key = (rule_name, symbol, date)
+                if key in self._seen_alerts:
+                    continue
+                self._seen_alerts.add(key)
+                new_alerts.append({'rule': rule_name, 'symbol': symbol, 'date': date})
+
+        for symbol in symbols:
+            self._last_seen[symbol] = frames[symbol].index[-1]
+        self._log.extend(new_alerts)
+        return pd.DataFrame(new_alerts, columns=['rule', 'symbol', 'date'])
+
+    def alert_log(self):
+        """
+        返回历次产生的全部告警（已去重）
+        """
+        return pd.DataFrame(self._log, columns=['rule', 'symbol', 'date'])
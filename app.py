@@ -1,7 +1,13 @@
+import os
+import threading
 import streamlit as st
 from data_fetcher import DataFetcher
+from data_cache import SharedDataCache
+from synthetic_market import SyntheticMarket
 from technical_indicators import TechnicalIndicators
 from visualizer import Visualizer
+from composite_index import CompositeBuilder
+from watchlist import WatchlistGrid
 from datetime import datetime, timedelta
 import pandas as pd
 
@@ -12,8 +18,21 @@ st.set_page_config(
     layout="wide"
 )
 
-# 初始化
-fetcher = DataFetcher()
+# 初始化（设置环境变量 STOCK_DATA_PROVIDER=synthetic 时使用离线合成行情，便于离线演示和压测）
+@st.cache_resource
+def get_shared_fetcher():
+    # 进程内所有会话共用一个数据缓存，同一股票的并发请求只获取一次
+    if os.environ.get('STOCK_DATA_PROVIDER') == 'synthetic':
+        return SharedDataCache(DataFetcher(data_dir=os.path.join('data', 'synthetic'), provider=SyntheticMarket()))
+    return SharedDataCache(DataFetcher())
+
+@st.cache_resource
+def get_watchlist_builder(_fetcher):
+    # 自选股看板从本地缓存批量读取收盘价，面板在各会话间共享，读取时加锁
+    data_fetcher = _fetcher.fetcher
+    return CompositeBuilder(data_dir=data_fetcher.store.data_dir, provider=data_fetcher.provider), threading.Lock()
+
+fetcher = get_shared_fetcher()
 ti_calculator = TechnicalIndicators()
 visualizer = Visualizer()
 
@@ -23,6 +42,9 @@ st.title("📈 个股技术指标分析与可视化")
 # 创建侧边栏
 st.sidebar.header("参数设置")
 
+# 模式选择
+mode = st.sidebar.radio("模式", ["个股分析", "自选股看板"], horizontal=True)
+
 # 股票代码输入
 stock_symbol = st.sidebar.text_input("股票代码", value="600000", help="输入A股股票代码，如：600000")
 
@@ -47,9 +69,57 @@ show_boll = st.sidebar.checkbox("布林带(BOLL)", value=True)
 show_volume_obv = st.sidebar.checkbox("成交量与OBV", value=True)
 show_combined = st.sidebar.checkbox("组合图表", value=True)
 
+# 自选股看板：所有股票的迷你图画在一个图表中，只重新计算数据有变化的股票
+if mode == "自选股看板":
+    st.sidebar.header("自选股")
+    watchlist_text = st.sidebar.text_area("股票代码", value="600000, 600036, 000001, 000858, 300750",
+                                          help="用逗号、空格或换行分隔")
+    watchlist = list(dict.fromkeys(watchlist_text.replace(',', ' ').replace('，', ' ').split()))
+    grid_cols = st.sidebar.slider("每行个数", min_value=2, max_value=10, value=5)
+    use_spot = st.sidebar.checkbox("叠加实时行情", value=False, help="用全市场行情快照中的最新价更新当天的迷你图")
+    
+    builder, builder_lock = get_watchlist_builder(fetcher)
+    if 'watchlist_grid' not in st.session_state:
+        st.session_state['watchlist_grid'] = WatchlistGrid(builder)
+    grid = st.session_state['watchlist_grid']
+    
+    if st.sidebar.button("更新数据"):
+        # 按侧边栏的时间范围获取数据写入本地缓存，已有的日期不会重复下载
+        progress = st.progress(0.0)
+        for i, symbol in enumerate(watchlist):
+            fetcher.fetch_stock_data(symbol, start_date_str, end_date_str)
+            progress.progress((i + 1) / len(watchlist))
+        progress.empty()
+    
+    quotes, trade_date = None, None
+    if use_spot:
+        spot = fetcher.fetcher.spot
+        quotes, trade_date = spot.quotes(watchlist), spot.trade_date
+    
+    with builder_lock:
+        changed = grid.refresh(watchlist, quotes=quotes, trade_date=trade_date)
+    tiles = grid.tiles(watchlist)
+    
+    st.subheader(f"📋 自选股看板（{len(tiles)} 只）")
+    if tiles:
+        fig = visualizer.plot_watchlist_grid(tiles, cols=grid_cols)
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"本次刷新重新计算 {len(changed)} 只股票，其余沿用缓存")
+    missing = [symbol for symbol in watchlist if symbol not in {tile['symbol'] for tile in tiles}]
+    if missing:
+        st.info(f"本地没有数据的股票: {', '.join(missing)}，请点击“更新数据”")
+
 # 主界面内容
-if st.sidebar.button("开始分析"):
+if mode == "个股分析":
+    live_bar = st.sidebar.checkbox("盘中更新当天K线", value=False,
+                                   help="用全市场行情快照更新已缓存数据中最新交易日的临时K线")
+
+if mode == "个股分析" and st.sidebar.button("开始分析"):
     with st.spinner("正在获取数据..."):
+        if live_bar and end_date_str >= datetime.now().strftime("%Y-%m-%d"):
+            # 共享缓存中的数据在有效期内不会重新获取，先用快照更新其中的临时K线（全市场行情按间隔最多下载一次）
+            fetcher.update_provisional_bars(fetcher.fetcher.spot)
+        
         # 获取股票数据
         df = fetcher.fetch_stock_data(stock_symbol, start_date_str, end_date_str)
         
@@ -128,6 +198,7 @@ st.sidebar.markdown("2. 选择时间范围")
 st.sidebar.markdown("3. 选择要查看的指标")
 st.sidebar.markdown("4. 点击开始分析")
 st.sidebar.markdown("5. 查看图表和数据")
+st.sidebar.markdown("6. 自选股看板：输入多只股票代码，点击更新数据后查看迷你图")
 
 # 底部信息
 st.markdown("---")
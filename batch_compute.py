@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from adjustment_store import AdjustmentStore
+from technical_indicators import TechnicalIndicators
+
+DEFAULT_INDICATORS = ['MA', 'MACD', 'KDJ', 'RSI', 'BOLL', 'OBV']
+
+
+def output_path(output_dir, symbol):
+    """
+    单只股票的输出文件，按股票代码分区（每只股票一个parquet文件，含symbol列），
+    整个目录可以用 pd.read_parquet(output_dir) 作为一个数据集读取
+    """
+    return os.path.join(output_dir, f"{symbol}.parquet")
+
+
+def process_chunk(symbols, params):
+    """
+    在工作进程中处理一批股票：读取本地K线、计算指标、写出parquet
+
+    参数:
+        symbols: 股票代码列表
+        params: 任务参数（data_dir、output_dir、start_date、end_date、adjust、indicators）
+
+    返回:
+        dict: 本批的股票数、写出数、跳过的股票、K线行数和耗时
+    """
+    start = time.perf_counter()
+    store = AdjustmentStore(params['data_dir'])
+    ti_calculator = TechnicalIndicators()
+    written = 0
+    rows = 0
+    missing = []
+    for symbol in symbols:
+        bars = store.load_bars(symbol)
+        if bars is None:
+            missing.append(symbol)
+            continue
+        # 先在完整历史上计算指标，再截取日期范围，保证均线等指标在起始日期就有值
+        df = store.apply(bars.loc[:params['end_date']], store.load_factors(symbol), params['adjust'])
+        df = ti_calculator.calculate_indicators(df, params['indicators'])
+        df = df.loc[params['start_date']:params['end_date']]
+        if df.empty:
+            missing.append(symbol)
+            continue
+        df.insert(0, 'symbol', symbol)
+
+        # 先写隐藏的临时文件再替换，中断后不会留下不完整的输出，读取数据集时也会忽略临时文件
+        path = output_path(params['output_dir'], symbol)
+        fd, tmp_path = tempfile.mkstemp(dir=params['output_dir'], prefix='.', suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        written += 1
+        rows += len(df)
+        del df, bars
+    return {'symbols': len(symbols), 'written': written, 'rows': rows, 'missing': missing,
+            'seconds': time.perf_counter() - start}
+
+
+def load_symbols(value):
+    """
+    解析股票列表：逗号分隔的代码，或 @文件路径（每行一个代码）
+    """
+    if value.startswith('@'):
+        with open(value[1:], encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return [symbol.strip() for symbol in value.split(',') if symbol.strip()]
+
+
+def check_job(output_dir, params, overwrite):
+    """
+    记录任务参数；输出目录中已有不同参数的任务时拒绝续跑，避免混合不同口径的结果
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    job_path = os.path.join(output_dir, '_job.json')
+    job = {key: params[key] for key in ['start_date', 'end_date', 'adjust', 'indicators']}
+    if os.path.exists(job_path) and not overwrite:
+        with open(job_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous != job:
+            raise ValueError(f"输出目录 {output_dir} 中已有参数不同的任务 {previous}，请换目录或使用 --overwrite")
+    with open(job_path, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False)
+
+
+def run_batch(symbols, start_date, end_date, output_dir, data_dir='data', indicators=None, adjust='qfq',
+              chunk_size=50, workers=None, overwrite=False):
+    """
+    批量计算技术指标
+
+    股票按chunk_size分批交给进程池，同时在途的批次不超过 2 x workers，
+    峰值内存只与批大小和进程数有关，与股票总数无关。已有输出的股票会跳过，中断后重新运行即可续跑。
+
+    参数:
+        symbols: 股票代码列表
+        start_date: 开始日期，格式 'YYYY-MM-DD'
+        end_date: 结束日期，格式 'YYYY-MM-DD'
+        output_dir: 输出目录
+        data_dir: 本地数据目录（DataFetcher缓存的不复权K线和复权因子）
+        indicators: 指标名称列表，取值见 TechnicalIndicators.INDICATORS
+        adjust: 'qfq' 前复权，'hfq' 后复权，'' 不复权
+        chunk_size: 每批股票数
+        workers: 进程数，默认为CPU核数
+        overwrite: 是否忽略已有输出重新计算
+
+    返回:
+        dict: 汇总统计
+    """
+    indicators = indicators or DEFAULT_INDICATORS
+    unknown = [name for name in indicators if name not in TechnicalIndicators.INDICATORS]
+    if unknown:
+        raise ValueError(f"未知的技术指标: {unknown}")
+    params = {'data_dir': data_dir, 'output_dir': output_dir, 'start_date': start_date, 'end_date': end_date,
+              'adjust': adjust, 'indicators': indicators}
+    check_job(output_dir, params, overwrite)
+
+    todo = [symbol for symbol in dict.fromkeys(symbols)
+            if overwrite or not os.path.exists(output_path(output_dir, symbol))]
+    skipped = len(symbols) - len(todo)
+    chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    print(f"共 {len(symbols)} 只股票，已完成 {skipped} 只，本次处理 {len(todo)} 只，分 {len(chunks)} 批")
+
+    workers = workers or os.cpu_count() or 1
+    summary = {'chunks': len(chunks), 'written': 0, 'rows': 0, 'missing': [], 'skipped': skipped}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        next_chunk = 0
+        done_chunks = 0
+        while next_chunk < len(chunks) or pending:
+            # 限制在途批次数，避免一次性提交全部任务
+            while next_chunk < len(chunks) and len(pending) < 2 * workers:
+                pending[pool.submit(process_chunk, chunks[next_chunk], params)] = next_chunk
+                next_chunk += 1
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = pending.pop(future)
+                stats = future.result()
+                done_chunks += 1
+                summary['written'] += stats['written']
+                summary['rows'] += stats['rows']
+                summary['missing'].extend(stats['missing'])
+                seconds = max(stats['seconds'], 1e-9)
+                print(f"批次 {index + 1}/{len(chunks)}（完成 {done_chunks}）: {stats['written']}/{stats['symbols']} 只股票, "
+                      f"{stats['rows']} 行, {stats['seconds']:.2f}s, "
+                      f"{stats['symbols'] / seconds:.1f} 只/秒, {stats['rows'] / seconds:.0f} 行/秒")
+    summary['seconds'] = time.perf_counter() - start
+    if summary['missing']:
+        print(f"本地没有数据的股票 {len(summary['missing'])} 只: {', '.join(summary['missing'][:20])}"
+              f"{' ...' if len(summary['missing']) > 20 else ''}")
+    print(f"完成: 写出 {summary['written']} 只股票, {summary['rows']} 行, 耗时 {summary['seconds']:.2f}s")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='批量计算股票池的技术指标，输出按股票分区的parquet')
+    parser.add_argument('symbols', help='股票代码，逗号分隔；或 @文件路径（每行一个代码）')
+    parser.add_argument('--start', required=True, help='开始日期，格式 YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='结束日期，格式 YYYY-MM-DD')
+    parser.add_argument('--output', required=True, help='输出目录')
+    parser.add_argument('--data-dir', default='data', help='本地数据目录')
+    parser.add_argument('--indicators', default=','.join(DEFAULT_INDICATORS),
+                        help=f"指标，逗号分隔，可选: {','.join(TechnicalIndicators.INDICATORS)}")
+    parser.add_argument('--adjust', default='qfq', choices=['qfq', 'hfq', 'none'], help='复权方式')
+    parser.add_argument('--chunk-size', type=int, default=50, help='每批股票数')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认为CPU核数')
+    parser.add_argument('--overwrite', action='store_true', help='忽略已有输出重新计算')
+    args = parser.parse_args()
+
+    try:
+        run_batch(load_symbols(args.symbols), args.start, args.end, args.output, data_dir=args.data_dir,
+                  indicators=[name.strip().upper() for name in args.indicators.split(',') if name.strip()],
+                  adjust='' if args.adjust == 'none' else args.adjust,
+                  chunk_size=args.chunk_size, workers=args.workers, overwrite=args.overwrite)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
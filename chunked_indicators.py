@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def window_sums(values, n):
+    """
+    长度为n的滑动窗口求和，每个窗口都按从旧到新的固定顺序相加
+
+    与滚动累加不同，结果只取决于窗口内的n个值，和数据从哪里开始、怎样分块无关。
+
+    返回:
+        np.ndarray: 长度为 len(values) - n + 1 的窗口和
+    """
+    m = len(values) - n + 1
+    if m <= 0:
+        return np.empty(0)
+    total = values[:m].copy()
+    for j in range(1, n):
+        total += values[j:j + m]
+    return total
+
+
+class StreamingEMA:
+    """
+    可跨块延续的EMA，初值口径与talib一致：
+    累计到seed_at个观测值时，以最近period个值的简单平均作为初值，之后按 alpha=2/(period+1) 递推
+    """
+
+    def __init__(self, period, seed_at=None):
+        self.period = period
+        self.seed_at = seed_at or period
+        self.alpha = 2 / (period + 1)
+        self.pending = []
+        self.value = None
+
+    def update(self, values):
+        out = np.full(len(values), np.nan)
+        start = 0
+        if self.value is None:
+            start = min(self.seed_at - len(self.pending), len(values))
+            self.pending.extend(values[:start].tolist())
+            if len(self.pending) < self.seed_at:
+                return out
+            # 与talib相同，按顺序逐个累加求初值
+            total = 0.0
+            for value in self.pending[-self.period:]:
+                total += value
+            self.value = total / self.period
+            self.pending = []
+            out[start - 1] = self.value
+        if start < len(values):
+            # 把上一块的末值作为第一个观测值接着递推，与整段一次递推逐位相同
+            series = pd.Series(np.concatenate([[self.value], values[start:]]))
+            smoothed = series.ewm(alpha=self.alpha, adjust=False).mean().to_numpy()[1:]
+            out[start:] = smoothed
+            self.value = smoothed[-1]
+        return out
+
+
+class StreamingWilder(StreamingEMA):
+    """
+    可跨块延续的Wilder平滑（RSI使用）：以前period个值的简单平均为初值，之后按 alpha=1/period 递推
+    """
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.alpha = 1 / period
+
+
+class ChunkedIndicators:
+    """
+    分块计算全部技术指标（与 TechnicalIndicators.calculate_all_indicators 相同的指标和列名）
+
+    按固定大小的块依次处理很长的序列，块与块之间只携带每个指标需要的上下文：
+    均线和布林带最近的窗口数据、MACD和RSI的平滑状态（含预热期）、KDJ的K/D递推值、OBV的累计值。
+    无论怎样分块，拼接后的结果都与整段一次计算（chunk_size不小于序列长度）逐位相同。
+
+    MA、BOLL按窗口求和、MACD和RSI按pandas ewm递推，与talib的滚动累加结果只有浮点舍入级别的差异；
+    KDJ与 TechnicalIndicators.calculate_kdj、OBV与talib.OBV逐位相同。
+    """
+
+    def __init__(self, ma_periods=(5, 10, 20, 60), fastperiod=12, slowperiod=26, signalperiod=9,
+                 kdj_n=9, m1=3, m2=3, rsi_period=14, boll_period=20, nbdevup=2, nbdevdn=2):
+        self.ma_periods = list(ma_periods)
+        self.kdj_n = kdj_n
+        self.m1 = m1
+        self.m2 = m2
+        self.boll_period = boll_period
+        self.nbdevup = nbdevup
+        self.nbdevdn = nbdevdn
+        self.rsi_period = rsi_period
+        # 需要携带的最近K线数：最长的窗口减一
+        self.carry = max(self.ma_periods + [boll_period, kdj_n]) - 1
+        self._tail = None
+        self._bars_seen = 0
+
+        # MACD：快慢线都在慢线可以起算时开始（与talib.MACD一致），信号线在MACD上再预热signalperiod根
+        self._slow = StreamingEMA(slowperiod)
+        self._fast = StreamingEMA(fastperiod, seed_at=slowperiod)
+        self._signal = StreamingEMA(signalperiod)
+
+        # RSI：第一根K线没有涨跌，之后的涨跌幅做Wilder平滑
+        self._gain = StreamingWilder(rsi_period)
+        self._loss = StreamingWilder(rsi_period)
+        self._prev_close = None
+
+        self._k = 50.0
+        self._d = 50.0
+        self._obv = None
+
+    def update(self, chunk):
+        """
+        处理下一块K线
+
+        参数:
+            chunk: 包含open、high、low、close、volume列的DataFrame，必须紧接上一块
+
+        返回:
+            pd.DataFrame: 本块的K线及全部技术指标
+        """
+        if chunk[OHLCV_COLUMNS].isna().any().any():
+            raise ValueError("分块计算要求K线数据中没有缺失值")
+        df = chunk.copy()
+        n_new = len(df)
+        if n_new == 0:
+            return df
+
+        # 拼上上一块末尾的K线，窗口类指标在ext上计算后只保留本块部分
+        current = df[['high', 'low', 'close']].to_numpy(dtype=float)
+        ext = current if self._tail is None else np.vstack([self._tail, current])
+        n_carry = len(ext) - n_new
+        high, low, close = ext[:, 0], ext[:, 1], ext[:, 2]
+
+        # 1. 均线
+        means = {}
+        for period in sorted(set(self.ma_periods + [self.boll_period])):
+            means[period] = self._window_values(window_sums(close, period) / period, period, n_carry, len(ext))
+        for period in self.ma_periods:
+            df[f'MA{period}'] = means[period]
+
+        # 2. MACD
+        chunk_close = close[n_carry:]
+        slow = self._slow.update(chunk_close)
+        fast = self._fast.update(chunk_close)
+        macd = fast - slow
+        valid = ~np.isnan(macd)
+        signal = np.full(n_new, np.nan)
+        signal[valid] = self._signal.update(macd[valid])
+        # 与talib一致，信号线有值之前MACD也为NaN
+        macd[np.isnan(signal)] = np.nan
+        df['MACD'] = macd
+        df['MACD_Signal'] = signal
+        df['MACD_Hist'] = macd - signal
+
+        # 3. KDJ
+        self._calculate_kdj(df, high, low, close, n_carry)
+
+        # 4. RSI
+        prev = np.concatenate([[np.nan if self._prev_close is None else self._prev_close], chunk_close[:-1]])
+        diff = chunk_close - prev
+        has_diff = ~np.isnan(diff)
+        gain = np.full(n_new, np.nan)
+        loss = np.full(n_new, np.nan)
+        gain[has_diff] = self._gain.update(np.where(diff > 0, diff, 0.0)[has_diff])
+        loss[has_diff] = self._loss.update(np.where(diff < 0, -diff, 0.0)[has_diff])
+        total = gain + loss
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = np.where(np.abs(total) < 1e-14, 0.0, 100 * (gain / total))
+        rsi[np.isnan(total)] = np.nan
+        df['RSI'] = rsi
+        self._prev_close = chunk_close[-1]
+
+        # 5. 布林带
+        middle = means[self.boll_period]
+        n = self.boll_period
+        squares = np.full(n_new, np.nan)
+        if len(ext) >= n:
+            window_mean = window_sums(close, n) / n
+            m = len(window_mean)
+            total = np.zeros(m)
+            for j in range(n):
+                total += (close[j:j + m] - window_mean) ** 2
+            squares = self._window_values(total / n, n, n_carry, len(ext))
+        std = np.sqrt(squares)
+        df['BOLL_Upper'] = middle + self.nbdevup * std
+        df['BOLL_Middle'] = middle
+        df['BOLL_Lower'] = middle - self.nbdevdn * std
+
+        # 6. OBV：与talib一致，第一根K线的OBV为当日成交量
+        volume = df['volume'].to_numpy(dtype=float)
+        direction = np.sign(diff)
+        signed = np.where(np.isnan(direction), 0.0, direction) * volume
+        if self._obv is None:
+            signed[0] = volume[0]
+            obv = np.cumsum(signed)
+        else:
+            obv = np.cumsum(np.concatenate([[self._obv], signed]))[1:]
+        df['OBV'] = obv
+        self._obv = obv[-1]
+
+        self._bars_seen += n_new
+        self._tail = ext[-self.carry:] if self.carry > 0 else ext[:0]
+        return df
+
+    def _window_values(self, values, n, n_carry, n_ext):
+        """
+        把ext上长度为 n_ext - n + 1 的窗口结果对齐到本块，历史不足n根的位置为NaN
+        """
+        out = np.full(n_ext, np.nan)
+        out[n - 1:] = values
+        return out[n_carry:]
+
+    def _calculate_kdj(self, df, high, low, close, n_carry):
+        # 与 TechnicalIndicators.calculate_kdj 的计算方式完全一致
+        n = self.kdj_n
+        highest = pd.Series(high).rolling(window=n).max()
+        lowest = pd.Series(low).rolling(window=n).min()
+        delta = highest - lowest
+        delta = delta.fillna(1)
+        delta[delta == 0] = 1
+        rsv = ((pd.Series(close) - lowest) / delta * 100).to_numpy(dtype=float)[n_carry:]
+
+        m1, m2 = self.m1, self.m2
+        k_values = [0.0] * len(rsv)
+        d_values = [0.0] * len(rsv)
+        k, d = self._k, self._d
+        for i, value in enumerate(rsv.tolist()):
+            if self._bars_seen + i == 0:
+                # 整个序列的第一根K线：K、D取初值50
+                pass
+            elif not np.isnan(value):
+                k = k * (m1 - 1) / m1 + value * 1 / m1
+                d = d * (m2 - 1) / m2 + k * 1 / m2
+            k_values[i] = k
+            d_values[i] = d
+        self._k, self._d = k, d
+
+        k_series = pd.Series(k_values, index=df.index)
+        d_series = pd.Series(d_values, index=df.index)
+        df['KDJ_K'] = k_series
+        df['KDJ_D'] = d_series
+        df['KDJ_J'] = 3 * k_series - 2 * d_series
+
+    def run(self, chunks):
+        """
+        依次处理多块K线（如 pd.read_csv(..., chunksize=...) 的结果），逐块产出带指标的结果
+
+        参数:
+            chunks: 按时间顺序排列的DataFrame可迭代对象
+
+        返回:
+            generator: 每块的计算结果
+        """
+        for chunk in chunks:
+            yield self.update(chunk)
+
+
+def iter_chunks(df, chunk_size):
+    """
+    把DataFrame按固定行数切块
+    """
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def calculate_all_indicators_chunked(df, chunk_size=100000, **params):
+    """
+    分块计算全部技术指标并拼接结果
+
+    参数:
+        df: 包含股票数据的DataFrame
+        chunk_size: 每块的K线数
+        **params: 指标参数，见 ChunkedIndicators
+
+    返回:
+        pd.DataFrame: 包含所有技术指标的DataFrame
+    """
+    calculator = ChunkedIndicators(**params)
+    return pd.concat(list(calculator.run(iter_chunks(df, chunk_size))))
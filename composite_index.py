@@ -0,0 +1,295 @@
+import os
+import numpy as np
+import pandas as pd
+import akshare as ak
+from adjustment_store import AdjustmentStore
+
+# 面板中按 日期 x 股票 存放的字段，raw_close 为不复权收盘价（计算流通市值用）
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'raw_close']
+
+# 调仓频率：按自然月、季度、年的最后一个交易日收盘调仓
+REBALANCE_FREQS = {'M': 'M', 'Q': 'Q', 'Y': 'Y'}
+
+
+def ffill_rows(values):
+    """
+    二维数组沿日期方向向前填充缺失值（停牌日沿用最近的价格）
+    """
+    valid = ~np.isnan(values)
+    pos = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(pos, axis=0, out=pos)
+    filled = values[pos, np.arange(values.shape[1])]
+    # 第一根K线之前没有可填充的值，保持NaN
+    filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+    return filled
+
+
+class CompositeBuilder:
+    """
+    自定义指数/板块合成
+
+    把成分股本地缓存的K线对齐成 日期 x 股票 的面板，按权重向量化合成指数的OHLCV，
+    结果可以直接交给 TechnicalIndicators 计算指标、交给 Visualizer.plot_combined_charts 绘图。
+
+    指数按调仓日收盘时的目标权重折算每只成分股的持有份数，两次调仓之间份数不变：
+    - 停牌的成分股沿用停牌前的收盘价，开高低收都等于该价格，成交量为0
+    - 尚未上市（本地没有K线）的成分股权重为0，在上市后的第一个调仓日纳入
+    - 开盘、最高、最低按份数对成分股的开盘、最高、最低加权，成交量、成交额为成分股之和
+
+    面板按股票缓存，成分股的K线或复权因子文件更新后只重新读取这些股票，多个指数共用同一份面板。
+    """
+
+    def __init__(self, data_dir='data', provider=None, adjust='qfq', base=1000.0):
+        """
+        参数:
+            data_dir: 本地数据目录（DataFetcher缓存的不复权K线和复权因子）
+            provider: 行情数据源，用于获取流通股本，默认为akshare
+            adjust: 成分股价格的复权方式，'qfq' 前复权，'hfq' 后复权，'' 不复权
+            base: 指数基点
+        """
+        self.store = AdjustmentStore(data_dir)
+        self.provider = provider if provider is not None else ak
+        self.adjust = adjust
+        self.base = base
+        self._versions = {}  # symbol -> (K线文件修改时间, 因子文件修改时间)
+        self._float_shares = {}
+        self._dates = None
+        self._columns = {}
+        self._panel = {}
+
+    def _version(self, symbol):
+        versions = []
+        for kind in ['bars', 'factors']:
+            try:
+                versions.append(os.stat(self.store.path(kind, symbol)).st_mtime_ns)
+            except FileNotFoundError:
+                versions.append(None)
+        return tuple(versions)
+
+    def load(self, symbols):
+        """
+        把成分股读入面板，只重新读取新增或本地文件有更新的股票
+
+        参数:
+            symbols: 股票代码列表
+
+        返回:
+            list: 本次重新读取的股票代码
+        """
+        changed = {}
+        for symbol in dict.fromkeys(symbols):
+            version = self._version(symbol)
+            if version[0] is None:
+                continue
+            if self._versions.get(symbol) == version:
+                continue
+            bars = self.store.load_bars(symbol)
+            adjusted = self.store.apply(bars, self.store.load_factors(symbol), self.adjust)
+            frame = adjusted[['open', 'high', 'low', 'close', 'volume']].astype(float)
+            # stock_zh_a_hist 保存的K线成交额列名为'成交额'
+            amount_column = next((column for column in ('amount', '成交额') if column in bars.columns), None)
+            frame['amount'] = bars[amount_column].astype(float) if amount_column else np.nan
+            frame['raw_close'] = bars['close'].astype(float)
+            changed[symbol] = (version, frame)
+        if not changed:
+            return []
+
+        new_dates = [frame.index for _, frame in changed.values()
+                     if self._dates is None or not frame.index.difference(self._dates).empty]
+        if new_dates:
+            self._rebuild(changed)
+        else:
+            self._update(changed)
+        for symbol, (version, _) in changed.items():
+            self._versions[symbol] = version
+        return list(changed)
+
+    def _rebuild(self, changed):
+        # 出现新的交易日：按全部股票的日期并集重建面板
+        frames = {symbol: self._column_frame(symbol) for symbol in self._columns}
+        frames.update({symbol: frame for symbol, (_, frame) in changed.items()})
+        dates = pd.DatetimeIndex(np.unique(np.concatenate([frame.index.values for frame in frames.values()])))
+        self._dates = dates
+        self._columns = {symbol: j for j, symbol in enumerate(frames)}
+        self._panel = {field: np.full((len(dates), len(frames)), np.nan) for field in PANEL_FIELDS}
+        for symbol, frame in frames.items():
+            self._assign(symbol, frame)
+
+    def _update(self, changed):
+        # 日期都已在面板中：只替换有更新的列，新股票追加在后面
+        added = [symbol for symbol in changed if symbol not in self._columns]
+        if added:
+            for symbol in added:
+                self._columns[symbol] = len(self._columns)
+            extra = np.full((len(self._dates), len(added)), np.nan)
+            self._panel = {field: np.hstack([values, extra]) for field, values in self._panel.items()}
+        for symbol, (_, frame) in changed.items():
+            self._assign(symbol, frame)
+
+    def _assign(self, symbol, frame):
+        j = self._columns[symbol]
+        pos = self._dates.searchsorted(frame.index)
+        for field in PANEL_FIELDS:
+            column = self._panel[field][:, j]
+            column[:] = np.nan
+            column[pos] = frame[field].to_numpy()
+
+    def _column_frame(self, symbol):
+        j = self._columns[symbol]
+        values = {field: self._panel[field][:, j] for field in PANEL_FIELDS}
+        frame = pd.DataFrame(values, index=self._dates)
+        return frame[~np.isnan(frame['close'].to_numpy())]
+
+    def get_panel(self, symbols, field='close', start_date=None, end_date=None):
+        """
+        读取成分股某个字段的 日期 x 股票 表，停牌日为NaN
+
+        参数:
+            symbols: 股票代码列表，本地没有数据的股票不包含在结果中
+            field: 字段名，见 PANEL_FIELDS
+            start_date: 开始日期，格式 'YYYY-MM-DD'
+            end_date: 结束日期，格式 'YYYY-MM-DD'
+
+        返回:
+            pd.DataFrame: 以date为索引、股票代码为列的表
+        """
+        self.load(symbols)
+        symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol in self._columns]
+        if not symbols:
+            return pd.DataFrame()
+        values = self._panel[field][:, [self._columns[symbol] for symbol in symbols]]
+        df = pd.DataFrame(values, index=pd.DatetimeIndex(self._dates, name='date'), columns=symbols)
+        df = df.loc[start_date:end_date]
+        return df[df.notna().any(axis=1)]
+
+    def float_shares(self, symbols):
+        """
+        获取成分股的流通股本（数据源 stock_individual_info_em 的“流通股”），结果在内存中缓存
+
+        返回:
+            pd.Series: 以股票代码为索引的流通股本
+        """
+        for symbol in symbols:
+            if symbol in self._float_shares:
+                continue
+            try:
+                info = self.provider.stock_individual_info_em(symbol=symbol)
+                self._float_shares[symbol] = float(info.set_index('item')['value']['流通股'])
+            except Exception as e:
+                raise ValueError(f"获取 {symbol} 的流通股本失败: {e}")
+        return pd.Series({symbol: self._float_shares[symbol] for symbol in symbols}, dtype=float)
+
+    def _rebalance_rows(self, dates, rebalance):
+        if rebalance is None:
+            rows = []
+        elif isinstance(rebalance, str):
+            if rebalance not in REBALANCE_FREQS:
+                raise ValueError(f"未知的调仓频率: {rebalance}，可选 {list(REBALANCE_FREQS)} 或日期列表")
+            periods = dates.to_period(REBALANCE_FREQS[rebalance])
+            rows = np.flatnonzero(periods[:-1] != periods[1:])
+        else:
+            # 指定日期不是交易日时，在之前最近的交易日调仓
+            rows = dates.searchsorted(pd.DatetimeIndex(rebalance), side='right') - 1
+            rows = rows[(rows >= 0) & (rows < len(dates) - 1)]
+        return np.unique(np.concatenate([[0], rows])).astype(int)
+
+    def build(self, symbols, weights='equal', rebalance='Q', start_date=None, end_date=None):
+        """
+        合成指数行情
+
+        参数:
+            symbols: 成分股代码列表
+            weights: 'equal' 等权，'float_cap' 流通市值加权，或 {股票代码: 权重} 固定权重
+            rebalance: 调仓频率 'M'、'Q'、'Y'，调仓日期列表，或None（只在起始日建仓）
+            start_date: 开始日期，格式 'YYYY-MM-DD'，指数在这一天取基点
+            end_date: 结束日期，格式 'YYYY-MM-DD'
+
+        返回:
+            pd.DataFrame: 以date为索引的open、high、low、close、volume、amount，以及当日有交易的成分股数
+        """
+        self.load(symbols)
+        return self._build(symbols, weights, rebalance, start_date, end_date)
+
+    def build_many(self, baskets, start_date=None, end_date=None):
+        """
+        批量合成多个指数，全部成分股只检查、读取一次
+
+        参数:
+            baskets: {指数名称: {'symbols': [...], 'weights': ..., 'rebalance': ...}}
+
+        返回:
+            dict: {指数名称: 指数行情DataFrame}
+        """
+        self.load([symbol for basket in baskets.values() for symbol in basket['symbols']])
+        return {name: self._build(basket['symbols'], basket.get('weights', 'equal'), basket.get('rebalance', 'Q'),
+                                  start_date, end_date)
+                for name, basket in baskets.items()}
+
+    def _build(self, symbols, weights, rebalance, start_date, end_date):
+        symbols = list(dict.fromkeys(symbols))
+        missing = [symbol for symbol in symbols if symbol not in self._columns]
+        if missing:
+            raise ValueError(f"本地没有数据的成分股: {missing}")
+        cols = [self._columns[symbol] for symbol in symbols]
+        end = len(self._dates) if end_date is None else self._dates.searchsorted(pd.Timestamp(end_date), side='right')
+        start = 0 if start_date is None else self._dates.searchsorted(pd.Timestamp(start_date))
+
+        # 在开始日期之前的历史上向前填充，开始日期停牌的成分股也有价格
+        panel = {field: self._panel[field][:end, cols] for field in PANEL_FIELDS}
+        traded = ~np.isnan(panel['close'])
+        close = ffill_rows(panel['close'])[start:]
+        raw_close = ffill_rows(panel['raw_close'])[start:]
+        traded = traded[start:]
+        rows = traded.any(axis=1)
+        if not rows.any():
+            raise ValueError("指定日期范围内成分股都没有数据")
+        dates = self._dates[start:end][rows]
+        traded, close, raw_close = traded[rows], close[rows], raw_close[rows]
+        listed = ~np.isnan(close)
+        close = np.where(listed, close, 0.0)
+        prices = {field: np.where(traded, panel[field][start:][rows], close)
+                  for field in ['open', 'high', 'low']}
+
+        # 调仓日的目标权重
+        if isinstance(weights, str) and weights == 'equal':
+            target = listed.astype(float)
+        elif isinstance(weights, str) and weights == 'float_cap':
+            target = np.where(listed, raw_close, 0.0) * self.float_shares(symbols).to_numpy()
+        elif isinstance(weights, (dict, pd.Series)):
+            fixed = pd.Series(weights, dtype=float).reindex(symbols).fillna(0.0).to_numpy()
+            target = listed * fixed
+        else:
+            raise ValueError(f"未知的加权方式: {weights}")
+
+        # 逐个调仓日把目标权重折算为持有份数，调仓日收盘时指数点位不变
+        rebalance_rows = self._rebalance_rows(dates, rebalance)
+        units = np.zeros((len(rebalance_rows), len(symbols)))
+        level = self.base
+        for k, row in enumerate(rebalance_rows):
+            if k > 0:
+                level = units[k - 1] @ close[row]
+            total = target[row].sum()
+            if total <= 0:
+                if k == 0:
+                    raise ValueError("起始日没有可计算权重的成分股")
+                units[k] = units[k - 1]
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                units[k] = np.where(listed[row], target[row] / total * level / close[row], 0.0)
+
+        # 调仓日收盘后新份数生效：第t行使用 t 之前最近一次调仓的份数（第一行使用建仓份数）
+        segment = np.maximum(rebalance_rows.searchsorted(np.arange(len(dates)), side='left') - 1, 0)
+        held = units[segment]
+        # 当天有成交的成分股都没有成交额数据时为NaN，而不是0
+        amount = np.where(traded, panel['amount'][start:][rows], np.nan)
+        amount = np.where(np.isnan(amount).all(axis=1), np.nan, np.nansum(amount, axis=1))
+        result = pd.DataFrame({
+            'open': (held * prices['open']).sum(axis=1),
+            'high': (held * prices['high']).sum(axis=1),
+            'low': (held * prices['low']).sum(axis=1),
+            'close': (held * close).sum(axis=1),
+            'volume': np.where(traded, panel['volume'][start:][rows], 0.0).sum(axis=1),
+            'amount': amount,
+            'constituents': traded.sum(axis=1),
+        }, index=pd.DatetimeIndex(dates, name='date'))
+        return result
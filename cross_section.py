@@ -0,0 +1,194 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+def daily_returns(closes):
+    """
+    由 日期 x 股票 的收盘价计算日收益率
+
+    停牌日收益率为NaN，复牌当日的收益率相对停牌前最后一个收盘价计算。
+    """
+    returns = closes.ffill().pct_change(fill_method=None)
+    return returns.where(closes.notna())
+
+
+class RollingCovariance:
+    """
+    增量计算滚动协方差矩阵和相关系数矩阵
+
+    维护窗口内收益率的累加和，每来一个交易日只做一次加入、一次移出的外积更新（O(N²)），
+    不必对每个窗口重新计算（O(N²·W)）。停牌等缺失值按成对有效的样本计算，与
+    pandas 的 rolling().cov()/corr() 口径一致。累加和每隔window个交易日按窗口数据重算一次，
+    避免长时间加减带来的舍入误差累积。
+    """
+
+    def __init__(self, symbols, window=60, min_periods=None):
+        """
+        参数:
+            symbols: 股票代码列表（矩阵的行列顺序）
+            window: 窗口长度（交易日）
+            min_periods: 成对有效样本数少于该值时结果为NaN，默认为window
+        """
+        self.symbols = list(symbols)
+        self.window = window
+        self.min_periods = min_periods or window
+        n = len(self.symbols)
+        self._rows = deque()  # 窗口内的 (收益率, 有效标记)
+        self._count = np.zeros((n, n))  # 成对有效样本数
+        self._sum = np.zeros((n, n))  # [x, y]: y有效时x的收益率之和
+        self._sum_sq = np.zeros((n, n))  # [x, y]: y有效时x的收益率平方和
+        self._sum_xy = np.zeros((n, n))  # [x, y]: x、y收益率乘积之和
+        self._updates = 0
+
+    def update(self, returns):
+        """
+        加入一个交易日的收益率，超出窗口的最早一天同时移出
+
+        参数:
+            returns: 按symbols顺序的收益率数组，停牌为NaN
+        """
+        returns = np.asarray(returns, dtype=float)
+        mask = (~np.isnan(returns)).astype(float)
+        values = np.where(mask > 0, returns, 0.0)
+        self._rows.append((values, mask))
+        if len(self._rows) > self.window:
+            old_values, old_mask = self._rows.popleft()
+            # 加入和移出合并为一次 (N x 2) @ (2 x N) 的乘法
+            values = np.vstack([values, old_values])
+            mask = np.vstack([mask, old_mask])
+            sign = np.array([[1.0], [-1.0]])
+        else:
+            values = values[None, :]
+            mask = mask[None, :]
+            sign = np.array([[1.0]])
+        self._count += (mask * sign).T @ mask
+        self._sum += (values * sign).T @ mask
+        self._sum_sq += (values ** 2 * sign).T @ mask
+        self._sum_xy += (values * sign).T @ values
+
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._resync()
+
+    def _resync(self):
+        values = np.array([row[0] for row in self._rows])
+        mask = np.array([row[1] for row in self._rows])
+        self._count = mask.T @ mask
+        self._sum = values.T @ mask
+        self._sum_sq = (values ** 2).T @ mask
+        self._sum_xy = values.T @ values
+
+    def _moments(self):
+        count = np.where(self._count >= max(self.min_periods, 2), self._count, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = (self._sum_xy - self._sum * self._sum.T / count) / (count - 1)
+            var = (self._sum_sq - self._sum ** 2 / count) / (count - 1)
+        return cov, var
+
+    def covariance(self):
+        """
+        返回:
+            pd.DataFrame: 当前窗口的协方差矩阵
+        """
+        cov, _ = self._moments()
+        return pd.DataFrame(cov, index=self.symbols, columns=self.symbols)
+
+    def correlation(self):
+        """
+        返回:
+            pd.DataFrame: 当前窗口的相关系数矩阵
+        """
+        cov, var = self._moments()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(var * var.T)
+        corr = np.clip(corr, -1.0, 1.0)
+        diagonal = np.diag(corr).copy()
+        np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return pd.DataFrame(corr, index=self.symbols, columns=self.symbols)
+
+
+def rolling_matrices(returns, window=60, kind='corr', dates=None, min_periods=None):
+    """
+    沿日期逐日增量更新，产出指定日期的滚动相关系数/协方差矩阵
+
+    参数:
+        returns: 日期 x 股票 的收益率
+        window: 窗口长度（交易日）
+        kind: 'corr' 相关系数，'cov' 协方差
+        dates: 需要输出矩阵的日期，默认每个交易日都输出
+        min_periods: 成对有效样本数下限，默认为window
+
+    返回:
+        generator: (日期, 矩阵DataFrame)
+    """
+    if kind not in ('corr', 'cov'):
+        raise ValueError(f"未知的矩阵类型: {kind}")
+    wanted = None if dates is None else set(pd.DatetimeIndex(dates))
+    rolling = RollingCovariance(returns.columns, window=window, min_periods=min_periods)
+    for date, row in zip(returns.index, returns.to_numpy(dtype=float)):
+        rolling.update(row)
+        if wanted is None or date in wanted:
+            yield date, rolling.correlation() if kind == 'corr' else rolling.covariance()
+
+
+def rolling_beta(returns, benchmark_returns, window=60, min_periods=None):
+    """
+    各股票相对基准的滚动贝塔：cov(股票, 基准) / var(基准)，按成对有效的样本计算
+
+    参数:
+        returns: 日期 x 股票 的收益率
+        benchmark_returns: 基准收益率Series（如某只指数或 CompositeBuilder 合成的指数）
+        window: 窗口长度（交易日）
+        min_periods: 有效样本数下限，默认为window
+
+    返回:
+        pd.DataFrame: 日期 x 股票 的贝塔
+    """
+    min_periods = min_periods or window
+    benchmark = benchmark_returns.reindex(returns.index).to_numpy(dtype=float)[:, None]
+    mask = returns.notna().to_numpy() & ~np.isnan(benchmark)
+    x = np.where(mask, returns.to_numpy(dtype=float), 0.0)
+    y = np.where(mask, benchmark, 0.0)
+
+    def rolling_sum(values):
+        return pd.DataFrame(values, index=returns.index).rolling(window, min_periods=1).sum().to_numpy()
+
+    count = rolling_sum(mask.astype(float))
+    sum_x, sum_y = rolling_sum(x), rolling_sum(y)
+    sum_xy, sum_yy = rolling_sum(x * y), rolling_sum(y * y)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sum_xy - sum_x * sum_y / count
+        var = sum_yy - sum_y ** 2 / count
+        beta = np.where(count >= max(min_periods, 2), cov / var, np.nan)
+    return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+
+def relative_strength(closes, lookback=20, benchmark=None):
+    """
+    相对强弱：lookback个交易日的涨幅，提供基准时为相对基准的超额涨幅
+
+    参数:
+        closes: 日期 x 股票 的收盘价
+        lookback: 回看交易日数
+        benchmark: 基准收盘价Series，可选
+
+    返回:
+        pd.DataFrame: 日期 x 股票 的相对强弱
+    """
+    filled = closes.ffill()
+    strength = filled / filled.shift(lookback) - 1
+    if benchmark is not None:
+        benchmark = benchmark.reindex(closes.index).ffill()
+        strength = strength.sub(benchmark / benchmark.shift(lookback) - 1, axis=0)
+    return strength.where(closes.notna())
+
+
+def relative_strength_rank(closes, lookback=20, benchmark=None):
+    """
+    每个交易日按相对强弱对股票排名，1为最强
+
+    返回:
+        pd.DataFrame: 日期 x 股票 的名次
+    """
+    return relative_strength(closes, lookback, benchmark).rank(axis=1, ascending=False, method='min')
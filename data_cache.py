@@ -0,0 +1,164 @@
+import time
+import threading
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SharedDataCache:
+    """
+    进程内共享的行情数据缓存（放在DataFetcher前面）
+
+    - 相同股票、日期范围和复权方式的并发请求合并为一次获取（single-flight），
+      其余请求等待同一个结果
+    - 同一股票的不同日期范围串行获取，避免并发读写同一批本地文件
+    - 缓存数据不直接交给调用方，每次返回独立副本，按LRU在内存上限内淘汰，超过有效期后重新获取
+    """
+
+    def __init__(self, fetcher, max_bytes=256 * 1024 * 1024, ttl=300):
+        """
+        参数:
+            fetcher: DataFetcher实例
+            max_bytes: 缓存数据占用内存上限（字节）
+            ttl: 缓存有效期（秒），盘中当天K线会变化，过期后重新获取；None表示不过期
+        """
+        self.fetcher = fetcher
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (df, 字节数, 获取时间)
+        self._inflight = {}  # key -> Future
+        self._symbol_locks = {}
+        self._bytes = 0
+        self._stats = {'requests': 0, 'hits': 0, 'dedupe_hits': 0, 'fetches': 0, 'failures': 0, 'evictions': 0}
+
+    def fetch_stock_data(self, symbol, start_date, end_date, adjust='qfq'):
+        """
+        获取股票历史行情数据，参数与 DataFetcher.fetch_stock_data 相同
+
+        返回:
+            pd.DataFrame: 缓存数据的副本，调用方可以添加指标列或原地修改，不影响其他会话；获取失败时返回None
+        """
+        key = (symbol, start_date, end_date, adjust)
+        with self._lock:
+            self._stats['requests'] += 1
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0].copy()
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                symbol_lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+            else:
+                self._stats['dedupe_hits'] += 1
+
+        if not leader:
+            df = future.result()
+            return None if df is None else df.copy()
+
+        try:
+            with symbol_lock:
+                df = self.fetcher.fetch_stock_data(symbol, start_date, end_date, adjust=adjust)
+        except BaseException as e:
+            with self._lock:
+                self._stats['failures'] += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._stats['fetches'] += 1
+            if df is None:
+                self._stats['failures'] += 1
+            else:
+                self._store(key, df)
+            del self._inflight[key]
+        future.set_result(df)
+        return None if df is None else df.copy()
+
+    def _store(self, key, df):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (df, size, time.monotonic())
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def update_provisional_bars(self, snapshot):
+        """
+        用全市场行情快照更新缓存中当天的临时K线（缓存的日期范围包含快照交易日的条目）
+
+        参数:
+            snapshot: SpotSnapshot实例，整个刷新过程最多下载一次全市场行情
+
+        返回:
+            int: 更新的缓存条目数
+        """
+        trade_date = snapshot.trade_date
+        with self._lock:
+            items = list(self._entries.items())
+
+        store = self.fetcher.store
+        updated = {}
+        for key, (df, _, _) in items:
+            symbol, start_date, end_date, adjust = key
+            if not pd.Timestamp(start_date) <= trade_date <= pd.Timestamp(end_date):
+                continue
+            bar = snapshot.provisional_bar(symbol)
+            if bar is None:
+                continue
+            factors = store.load_factors(symbol)
+            if adjust == 'qfq' and factors is not None and len(factors) > 0 and factors.index[-1] == trade_date:
+                # 当天除权除息：前复权基准变为当天的新因子，缓存中的历史价格可能还是按旧因子计算的，
+                # 用本地不复权K线重新计算
+                raw = store.load_bars(symbol)
+                if raw is not None:
+                    df = store.apply(raw.loc[start_date:end_date], factors, adjust)
+            # 当天的临时K线按同样的因子复权
+            bar = store.apply(bar, factors, adjust)
+            new_df = df.copy()
+            new_df.loc[trade_date, list(bar.columns)] = bar.iloc[0].to_numpy()
+            updated[key] = new_df.sort_index()
+
+        with self._lock:
+            for key, new_df in updated.items():
+                # 更新期间可能已被淘汰，只替换仍在缓存中的条目
+                if key not in self._entries:
+                    continue
+                _, size, fetched_at = self._entries[key]
+                new_size = int(new_df.memory_usage(deep=True).sum())
+                self._entries[key] = (new_df, new_size, fetched_at)
+                self._bytes += new_size - size
+        return len(updated)
+
+    def invalidate(self, symbol=None):
+        """
+        清除缓存
+
+        参数:
+            symbol: 只清除该股票的缓存，为None时全部清除
+        """
+        with self._lock:
+            for key in [key for key in self._entries if symbol is None or key[0] == symbol]:
+                self._remove(key)
+
+    def stats(self):
+        """
+        返回缓存统计：请求数、命中数、合并的并发请求数、实际获取次数、失败次数、淘汰次数、条目数和占用内存
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
@@ -1,56 +1,172 @@
 import akshare as ak
 import pandas as pd
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from adjustment_store import AdjustmentStore
+from spot_snapshot import SpotSnapshot
+
+def market_symbol(symbol):
+    """
+    为股票代码加上交易所前缀，如 '600000' -> 'sh600000'
+    """
+    if symbol.startswith(('6', '9')):
+        return f"sh{symbol}"
+    if symbol.startswith(('4', '8')):
+        return f"bj{symbol}"
+    return f"sz{symbol}"
 
 class DataFetcher:
-    def __init__(self, data_dir='data'):
+    def __init__(self, data_dir='data', provider=None):
+        """
+        参数:
+            data_dir: 本地数据目录
+            provider: 行情数据源，需提供与akshare同名的接口，默认为akshare；
+                离线测试时可传入 synthetic_market.SyntheticMarket
+        """
         self.data_dir = data_dir
+        self.provider = provider if provider is not None else ak
         os.makedirs(self.data_dir, exist_ok=True)
+        self.store = AdjustmentStore(self.data_dir)
+        self.spot = SpotSnapshot(self.provider)
     
-    def fetch_stock_data(self, symbol, start_date, end_date):
+    def fetch_stock_data(self, symbol, start_date, end_date, adjust='qfq'):
         """
         获取股票历史行情数据
         
+        本地只保存不复权K线和后复权因子，复权序列在读取时生成；
+        只向akshare请求本地尚未覆盖的日期段，复权因子每天最多刷新一次。
+        请求包含今天而接口没有最新交易日的K线时，用全市场行情快照补一根临时K线，
+        临时K线只在返回结果中，不写入本地。
+        
         参数:
             symbol: 股票代码，如 '600000'
             start_date: 开始日期，格式 'YYYY-MM-DD'
             end_date: 结束日期，格式 'YYYY-MM-DD'
+            adjust: 'qfq' 前复权（默认），'hfq' 后复权，'' 不复权
         
         返回:
             pd.DataFrame: 包含股票历史行情数据的DataFrame
         """
-        # 构建文件名
-        file_name = f"{symbol}_{start_date}_{end_date}.csv"
-        file_path = os.path.join(self.data_dir, file_name)
+        meta = self.store.load_meta(symbol)
+        bars = self.store.load_bars(symbol)
         
-        # 检查文件是否已存在
-        if os.path.exists(file_path):
-            print(f"从本地加载数据: {file_path}")
-            df = pd.read_csv(file_path, index_col='date', parse_dates=True)
-            return df
+        today = datetime.now().strftime('%Y-%m-%d')
+        use_spot = False
+        
+        # 只请求本地没有覆盖的日期段
+        for segment_start, segment_end in self._missing_ranges(meta, start_date, end_date):
+            new_bars = self._fetch_raw_bars(symbol, segment_start, segment_end)
+            if new_bars is None:
+                continue
+            if new_bars.empty and segment_end >= today:
+                use_spot = True
+            if not new_bars.empty:
+                bars = self.store.save_bars(symbol, new_bars)
+                print(f"数据已保存到: {self.store.path('bars', symbol)}")
+            elif not pd.bdate_range(segment_start, segment_end).empty:
+                # 含工作日的日期段返回空数据可能是接口限流等临时情况，不记为已覆盖，下次重新请求
+                continue
+            self._extend_coverage(meta, segment_start, segment_end)
+        
+        if use_spot:
+            bars = self._append_provisional_bar(symbol, bars, start_date)
+        
+        if bars is None:
+            print("所有接口获取的数据都为空")
+            self.store.save_meta(symbol, meta)
+            return None
+        
+        factors = self._refresh_factors(symbol, meta)
+        self.store.save_meta(symbol, meta)
+        
+        df = bars.loc[start_date:end_date]
+        if df.empty:
+            print(f"本地数据中没有 {symbol} {start_date} 到 {end_date} 的行情")
+            return None
+        if adjust and factors is None:
+            print(f"没有 {symbol} 的复权因子，返回不复权数据")
+        print(f"从本地加载数据: {symbol} {start_date} 到 {end_date} (复权方式: {adjust or '不复权'})")
+        return self.store.apply(df, factors, adjust)
+    
+    def _missing_ranges(self, meta, start_date, end_date):
+        """
+        计算本地尚未覆盖的日期段（本地覆盖范围总是连续的一段）
+        """
+        if 'start' not in meta:
+            return [(start_date, end_date)]
+        ranges = []
+        if start_date < meta['start']:
+            day_before = (pd.to_datetime(meta['start']) - timedelta(days=1)).strftime('%Y-%m-%d')
+            ranges.append((start_date, day_before))
+        if end_date > meta['end']:
+            day_after = (pd.to_datetime(meta['end']) + timedelta(days=1)).strftime('%Y-%m-%d')
+            ranges.append((day_after, end_date))
+        return ranges
+    
+    def _extend_coverage(self, meta, start_date, end_date):
+        """
+        扩展本地覆盖范围；当天的K线盘中还会变化，覆盖范围最多到昨天
+        """
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        end_date = min(end_date, yesterday)
+        if end_date < start_date:
+            return
+        meta['start'] = min(meta.get('start', start_date), start_date)
+        meta['end'] = max(meta.get('end', end_date), end_date)
+    
+    def _refresh_factors(self, symbol, meta):
+        """
+        刷新后复权因子（每天最多请求一次），失败时使用本地因子
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        if meta.get('factors_checked') != today:
+            try:
+                factor_df = self.provider.stock_zh_a_daily(symbol=market_symbol(symbol), adjust="hfq-factor")
+                factors = factor_df.set_index(pd.to_datetime(factor_df['date']))['hfq_factor']
+                if self.store.save_factors(symbol, factors):
+                    print(f"复权因子已更新: {symbol}")
+                meta['factors_checked'] = today
+            except Exception as e:
+                print(f"获取复权因子失败: {e}")
+        return self.store.load_factors(symbol)
+    
+    def _append_provisional_bar(self, symbol, bars, start_date):
+        """
+        用全市场行情快照补充最新交易日的临时K线（只在内存中，不保存）；本地已有该交易日的K线时不补充
+        """
+        # 先只按交易日历判断是否需要临时K线，本地已有最新交易日的K线时不下载全市场行情
+        trade_date = self.spot.current_trade_date()
+        if trade_date < pd.Timestamp(start_date) or (bars is not None and trade_date <= bars.index[-1]):
+            return bars
+        print("接口没有最新交易日的数据，尝试使用全市场行情快照...")
+        # 快照只有最新数据，全市场行情按间隔缓存，多只股票共用一次下载
+        bar = self.spot.provisional_bar(symbol)
+        if bar is None or (bars is not None and bar.index[0] <= bars.index[-1]):
+            return bars
+        trade_date = bar.index[0]
+        print(f"使用行情快照作为 {trade_date.strftime('%Y-%m-%d')} 的临时K线")
+        return bar if bars is None else pd.concat([bars, bar])
+    
+    def _fetch_raw_bars(self, symbol, start_date, end_date):
+        """
+        从akshare获取不复权K线
         
-        # 从akshare获取数据
+        返回:
+            pd.DataFrame: 以date为索引的不复权K线，没有数据时为空DataFrame，请求失败时返回None
+        """
         print(f"从akshare获取数据: {symbol} {start_date} 到 {end_date}")
+        start = start_date.replace('-', '')
+        end = end_date.replace('-', '')
         try:
             # 尝试不同的akshare接口
             # 接口1: stock_zh_a_hist
             print(f"正在调用ak.stock_zh_a_hist，股票代码: {symbol}")
-            df = ak.stock_zh_a_hist(symbol=symbol, period="daily", start_date=start_date, end_date=end_date, adjust="qfq")
+            df = self.provider.stock_zh_a_hist(symbol=symbol, period="daily", start_date=start, end_date=end, adjust="")
             
             # 如果接口1返回空数据，尝试接口2: stock_zh_a_daily
             if df.empty:
                 print("接口1返回空数据，尝试调用ak.stock_zh_a_daily...")
-                df = ak.stock_zh_a_daily(symbol=f"sh{symbol}", start_date=start_date, end_date=end_date)
-            
-            # 如果接口2返回空数据，尝试接口3: stock_zh_a_spot
-            if df.empty:
-                print("接口2返回空数据，尝试调用ak.stock_zh_a_spot...")
-                # 这个接口只能获取最新数据
-                df = ak.stock_zh_a_spot()
-                if not df.empty:
-                    # 过滤指定股票
-                    df = df[df['代码'] == symbol]
+                df = self.provider.stock_zh_a_daily(symbol=market_symbol(symbol), start_date=start, end_date=end)
             
             # 调试：打印数据基本信息
             print(f"数据形状: {df.shape}")
@@ -59,8 +175,7 @@ class DataFetcher:
             
             # 检查数据是否为空
             if df.empty:
-                print("所有接口获取的数据都为空")
-                return None
+                return df
             
             # 数据处理
             if '日期' in df.columns:
@@ -81,11 +196,6 @@ class DataFetcher:
             
             df['date'] = pd.to_datetime(df['date'])
             df.set_index('date', inplace=True)
-            
-            # 保存到本地
-            df.to_csv(file_path)
-            print(f"数据已保存到: {file_path}")
-            
             return df
         except Exception as e:
             print(f"获取数据失败: {e}")
@@ -104,7 +214,7 @@ class DataFetcher:
             dict: 股票基本信息
         """
         try:
-            stock_info = ak.stock_individual_info_em(symbol=symbol)
+            stock_info = self.provider.stock_individual_info_em(symbol=symbol)
             return stock_info
         except Exception as e:
             print(f"获取股票信息失败: {e}")
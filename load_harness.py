@@ -0,0 +1,212 @@
+import io
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+import numpy as np
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from data_fetcher import DataFetcher
+from data_cache import SharedDataCache
+from technical_indicators import TechnicalIndicators
+from visualizer import Visualizer
+from synthetic_market import SyntheticMarket
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，不统计进程峰值内存
+    resource = None
+
+# 与app.py相同的处理流程：获取数据 -> 计算指标 -> 绘图并序列化（Streamlit会把图表转成JSON发给浏览器）
+STAGES = ['fetch', 'indicators', 'visualize']
+
+
+def run_session(fetcher, symbol, start_date, end_date, trace_memory=False):
+    """
+    模拟一次“开始分析”，返回各阶段耗时（秒）、各阶段输出大小（字节）和各阶段峰值内存分配（字节），失败时返回None
+
+    参数:
+        trace_memory: 是否统计峰值内存分配（需要已调用 tracemalloc.start()，否则结果为空字典）
+    """
+    try:
+        return _run_session(fetcher, symbol, start_date, end_date, trace_memory)
+    except Exception as e:
+        print(f"会话失败: {symbol} {e}")
+        return None
+
+
+def _run_session(fetcher, symbol, start_date, end_date, trace_memory):
+    timings = {}
+    sizes = {}
+    peaks = {}
+    tracing = trace_memory and tracemalloc.is_tracing()
+    session_base = tracemalloc.get_traced_memory()[0] if tracing else 0
+
+    @contextlib.contextmanager
+    def measure(stage):
+        # 峰值内存为阶段内相对阶段开始时新增分配的最大值，total为整个会话内相对会话开始时的最大值
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        timings[stage] = time.perf_counter() - start
+        if tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            peaks[stage] = peak - base
+            peaks['total'] = max(peaks.get('total', 0), peak - session_base)
+
+    with measure('fetch'):
+        df = fetcher.fetch_stock_data(symbol, start_date, end_date)
+    if df is None:
+        return None
+    sizes['fetch'] = df.memory_usage(deep=True).sum()
+
+    with measure('indicators'):
+        df = TechnicalIndicators().calculate_all_indicators(df)
+    sizes['indicators'] = df.memory_usage(deep=True).sum()
+
+    with measure('visualize'):
+        fig = Visualizer().plot_combined_charts(df)
+        payload = fig.to_json()
+    sizes['visualize'] = len(payload)
+
+    return timings, sizes, peaks
+
+
+def max_rss_mb():
+    """
+    进程峰值常驻内存（MB），无法获取时返回NaN
+    """
+    if resource is None:
+        return float('nan')
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss在macOS上单位为字节，在Linux上为KB
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def run_load_test(sessions=200, concurrency=16, n_symbols=50, days=365, seed=0, data_dir=None, shared_cache=False,
+                  memory_sessions=5):
+    """
+    用合成行情驱动多个并发会话跑完整流程
+
+    参数:
+        sessions: 会话总数
+        concurrency: 并发会话数（Streamlit每个会话一个线程）
+        n_symbols: 模拟市场的股票数量，会话随机选择其中一只
+        days: 每次分析的日期跨度（天）
+        seed: 随机种子
+        data_dir: 本地数据目录，默认使用临时目录并在结束后删除
+        shared_cache: 是否像app.py一样在DataFetcher前面加进程内共享缓存
+        memory_sessions: 并发压测结束后用tracemalloc串行运行的会话数，用于统计各阶段峰值内存分配；
+            tracemalloc会明显拖慢运行，且按进程统计、无法区分并发的会话，所以不在并发压测中开启
+
+    返回:
+        dict: 各阶段耗时分位数、输出大小、峰值内存分配，吞吐量和进程峰值内存
+    """
+    market = SyntheticMarket(n_symbols=n_symbols, seed=seed)
+    own_dir = data_dir is None
+    data_dir = data_dir or tempfile.mkdtemp(prefix='load_harness_')
+    fetcher = DataFetcher(data_dir=data_dir, provider=market)
+    if shared_cache:
+        fetcher = SharedDataCache(fetcher)
+
+    end_date = market.dates[-1]
+    start_date = (end_date - timedelta(days=days)).strftime('%Y-%m-%d')
+    end_date = end_date.strftime('%Y-%m-%d')
+    rng = np.random.default_rng(seed)
+    symbols = rng.choice(market.symbols, size=sessions)
+
+    rss_before = max_rss_mb()
+    results = []
+    # DataFetcher逐步打印日志，压测时屏蔽
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(run_session, fetcher, symbol, start_date, end_date) for symbol in symbols]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        rss_peak = max_rss_mb()
+
+        memory_results = []
+        if memory_sessions > 0:
+            tracemalloc.start()
+            try:
+                memory_results = [run_session(fetcher, symbol, start_date, end_date, trace_memory=True)
+                                  for symbol in symbols[:memory_sessions]]
+            finally:
+                tracemalloc.stop()
+        memory_peaks = [result[2] for result in memory_results if result is not None]
+
+    if own_dir:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    completed = [result for result in results if result is not None]
+    report = {
+        'sessions': sessions,
+        'completed': len(completed),
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        'throughput': len(completed) / elapsed if elapsed > 0 else float('nan'),
+        'rss_before_mb': rss_before,
+        'rss_peak_mb': rss_peak,
+        'stages': {}
+    }
+    if shared_cache:
+        report['cache'] = fetcher.stats()
+    for stage in STAGES + ['total']:
+        if stage == 'total':
+            latencies = np.array([sum(timings.values()) for timings, _, _ in completed])
+            sizes = np.array([sum(sizes.values()) for _, sizes, _ in completed])
+        else:
+            latencies = np.array([timings[stage] for timings, _, _ in completed])
+            sizes = np.array([sizes[stage] for _, sizes, _ in completed])
+        if len(latencies) == 0:
+            continue
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        peaks = np.array([peaks[stage] for peaks in memory_peaks])
+        report['stages'][stage] = {
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': latencies.max() * 1000,
+            'mean_output_mb': sizes.mean() / 1024 / 1024,
+            'peak_alloc_mb': peaks.max() / 1024 / 1024 if len(peaks) > 0 else float('nan')
+        }
+    return report
+
+
+def print_report(report):
+    print(f"会话: {report['completed']}/{report['sessions']}  并发: {report['concurrency']}  "
+          f"耗时: {report['elapsed']:.2f}s  吞吐量: {report['throughput']:.1f} 会话/秒")
+    print(f"进程峰值常驻内存(RSS): {report['rss_peak_mb']:.1f}MB（压测前 {report['rss_before_mb']:.1f}MB）")
+    if 'cache' in report:
+        cache = report['cache']
+        print(f"共享缓存: 请求 {cache['requests']}  命中 {cache['hits']}  合并并发请求 {cache['dedupe_hits']}  "
+              f"实际获取 {cache['fetches']}  淘汰 {cache['evictions']}")
+    print(f"{'阶段':<12}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'输出(MB)':>10}"
+          f"{'峰值分配(MB)':>12}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<12}{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['max_ms']:>10.1f}{stats['mean_output_mb']:>10.2f}{stats['peak_alloc_mb']:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='用合成行情对 获取数据 -> 计算指标 -> 可视化 流程做并发压测')
+    parser.add_argument('--sessions', type=int, default=200, help='会话总数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发会话数')
+    parser.add_argument('--symbols', type=int, default=50, help='模拟市场的股票数量')
+    parser.add_argument('--days', type=int, default=365, help='每次分析的日期跨度（天）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--data-dir', default=None, help='本地数据目录，默认使用临时目录')
+    parser.add_argument('--shared-cache', action='store_true', help='在DataFetcher前面加进程内共享缓存')
+    parser.add_argument('--memory-sessions', type=int, default=5, help='压测后串行统计峰值内存分配的会话数，0表示不统计')
+    args = parser.parse_args()
+
+    print_report(run_load_test(sessions=args.sessions, concurrency=args.concurrency, n_symbols=args.symbols,
+                               days=args.days, seed=args.seed, data_dir=args.data_dir,
+                               shared_cache=args.shared_cache, memory_sessions=args.memory_sessions))
@@ -0,0 +1,190 @@
+import time
+import threading
+import numpy as np
+import pandas as pd
+import akshare as ak
+
+# 快照中保存的数值字段及其在 ak.stock_zh_a_spot 中的列名
+FIELDS = {
+    'close': '最新价',
+    'prev_close': '昨收',
+    'open': '今开',
+    'high': '最高',
+    'low': '最低',
+    'volume': '成交量',
+    'amount': '成交额',
+    'change_pct': '涨跌幅',
+}
+
+# 集合竞价开始时间，此前的快照仍是上一个交易日的行情
+AUCTION_START = pd.Timedelta(hours=9, minutes=15)
+
+
+def strip_market(code):
+    """
+    去掉交易所前缀，如 'sh600000' -> '600000'
+    """
+    return code[2:] if code[:2] in ('sh', 'sz', 'bj') else code
+
+
+def last_trade_date(now=None, trade_dates=None):
+    """
+    快照行情所属的交易日：不晚于now的最近一个交易日，当天集合竞价开始前取上一个交易日
+
+    参数:
+        now: 当前时间，默认取系统时间
+        trade_dates: 升序的交易日历（DatetimeIndex），为None时按工作日近似，无法识别节假日
+
+    返回:
+        pd.Timestamp: 交易日期
+    """
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    day = now.normalize()
+    if now - day < AUCTION_START:
+        day -= pd.Timedelta(days=1)
+    if trade_dates is None:
+        return pd.offsets.BDay().rollback(day)
+    return trade_dates[trade_dates.searchsorted(day, side='right') - 1]
+
+
+class SpotSnapshot:
+    """
+    全市场实时行情快照
+
+    每隔interval秒最多调用一次 stock_zh_a_spot 下载全市场行情，按股票代码建立索引，
+    数值字段存放在一个 (股票数 x 字段数) 的float64数组中，单只股票查询为O(1)。
+    刷新200只自选股只需一次接口调用。
+    新浪快照不带日期，交易日期按交易日历（tool_trade_date_hist_sina，每天最多下载一次）取最近一个交易日，
+    周末、节假日和开盘前都对应上一个交易日。
+    """
+
+    def __init__(self, provider=None, interval=60):
+        """
+        参数:
+            provider: 行情数据源，需提供 stock_zh_a_spot 接口，默认为akshare；
+                没有 tool_trade_date_hist_sina 接口时交易日按工作日近似
+            interval: 两次下载之间的最短间隔（秒）
+        """
+        self.provider = provider if provider is not None else ak
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._snapshot = None  # (代码->行号, 数值数组, 名称数组, 交易日期)
+        self._fetched_at = None
+        self._calendar = None  # (下载日期, 交易日历)
+        self.refresh_count = 0
+
+    def refresh(self, force=False):
+        """
+        距上次下载超过interval秒（或force为True）时重新下载全市场行情
+
+        返回:
+            bool: 是否实际下载了行情
+        """
+        with self._lock:
+            if not force and self._fetched_at is not None and time.monotonic() - self._fetched_at < self.interval:
+                return False
+            df = self.provider.stock_zh_a_spot()
+            codes = [strip_market(code) for code in df['代码'].astype(str)]
+            values = np.column_stack([pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+                                      for column in FIELDS.values()])
+            trade_date = last_trade_date(trade_dates=self._trade_dates())
+            # 整体替换引用，读取方拿到的始终是完整的一份快照
+            self._snapshot = ({code: i for i, code in enumerate(codes)}, values,
+                              df['名称'].to_numpy(dtype=object), trade_date)
+            self._fetched_at = time.monotonic()
+            self.refresh_count += 1
+            return True
+
+    def _trade_dates(self):
+        today = pd.Timestamp.now().normalize()
+        if self._calendar is None or self._calendar[0] != today:
+            trade_dates = None
+            if hasattr(self.provider, 'tool_trade_date_hist_sina'):
+                try:
+                    calendar = self.provider.tool_trade_date_hist_sina()
+                    trade_dates = pd.DatetimeIndex(pd.to_datetime(calendar['trade_date'])).sort_values()
+                except Exception as e:
+                    print(f"获取交易日历失败，按工作日计算交易日期: {e}")
+            self._calendar = (today, trade_dates)
+        return self._calendar[1]
+
+    def _current(self):
+        self.refresh()
+        return self._snapshot
+
+    def current_trade_date(self):
+        """
+        当前行情所属的交易日，只查交易日历，不下载全市场行情
+        """
+        return last_trade_date(trade_dates=self._trade_dates())
+
+    @property
+    def trade_date(self):
+        """快照对应的交易日期"""
+        return self._current()[3]
+
+    def get(self, symbol):
+        """
+        查询单只股票的最新行情
+
+        参数:
+            symbol: 股票代码，带不带交易所前缀均可
+
+        返回:
+            dict: 包含name和FIELDS中各字段的行情，快照中没有该股票时返回None
+        """
+        index, values, names, _ = self._current()
+        row = index.get(strip_market(symbol))
+        if row is None:
+            return None
+        quote = dict(zip(FIELDS, values[row].tolist()))
+        quote['name'] = names[row]
+        return quote
+
+    def quotes(self, symbols):
+        """
+        批量查询多只股票的最新行情
+
+        参数:
+            symbols: 股票代码列表
+
+        返回:
+            pd.DataFrame: 以股票代码为索引的行情，快照中没有的股票对应行为NaN
+        """
+        index, values, names, _ = self._current()
+        rows = np.array([index.get(strip_market(symbol), -1) for symbol in symbols], dtype=int)
+        found = rows >= 0
+        result = np.full((len(rows), len(FIELDS)), np.nan)
+        result[found] = values[rows[found]]
+        quote_names = np.full(len(rows), None, dtype=object)
+        quote_names[found] = names[rows[found]]
+        df = pd.DataFrame(result, index=pd.Index(list(symbols), name='symbol'), columns=list(FIELDS))
+        df.insert(0, 'name', quote_names)
+        return df
+
+    def provisional_bar(self, symbol, factor=1.0):
+        """
+        用快照生成交易日期（trade_date）的临时K线（盘中会继续变化，只应保存在内存中）
+
+        参数:
+            symbol: 股票代码
+            factor: 价格乘数，前复权/不复权为1，后复权传入最新后复权因子
+
+        返回:
+            pd.DataFrame: 以交易日期为索引的一行K线，没有该股票或当天未成交时返回None
+        """
+        index, values, _, trade_date = self._current()
+        row = index.get(strip_market(symbol))
+        if row is None:
+            return None
+        quote = dict(zip(FIELDS, values[row].tolist()))
+        if not quote['volume'] > 0:
+            return None
+        return pd.DataFrame({
+            'open': quote['open'] * factor,
+            'high': quote['high'] * factor,
+            'low': quote['low'] * factor,
+            'close': quote['close'] * factor,
+            # 新浪快照成交量单位为股，历史K线为手
+            'volume': quote['volume'] / 100,
+        }, index=pd.DatetimeIndex([trade_date], name='date'))
@@ -0,0 +1,233 @@
+import math
+import zlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from adjustment_store import AdjustmentStore
+
+# 模拟行情起始日期，同一股票无论请求什么范围都从这里开始生成，保证结果一致
+ORIGIN = '2000-01-03'
+
+
+class SyntheticMarket:
+    """
+    离线合成行情数据源
+
+    按股票代码生成确定性的OHLCV随机游走，包含停牌、涨跌停、放量和分红除息，
+    接口与DataFetcher用到的akshare函数一致，可直接作为 DataFetcher(provider=...) 使用，
+    用于离线测试和压力测试。
+    """
+
+    def __init__(self, n_symbols=100, seed=0, today=None, suspension_prob=0.002,
+                 limit_prob=0.01, spike_prob=0.02):
+        """
+        参数:
+            n_symbols: 模拟市场中的股票数量（决定全市场快照的规模）
+            seed: 随机种子
+            today: 模拟的“今天”，格式 'YYYY-MM-DD'，默认取当前日期
+            suspension_prob: 每个交易日开始停牌的概率
+            limit_prob: 每个交易日出现涨停或跌停的概率
+            spike_prob: 每个交易日成交量异常放大的概率
+        """
+        self.seed = seed
+        self.today = pd.Timestamp(today or datetime.now().strftime('%Y-%m-%d'))
+        self.suspension_prob = suspension_prob
+        self.limit_prob = limit_prob
+        self.spike_prob = spike_prob
+        self.symbols = self._make_symbols(n_symbols)
+        # 所有股票共用同一交易日历，只生成一次
+        self.dates = pd.bdate_range(ORIGIN, self.today, name='date')
+        self._cache = {}
+
+    def _make_symbols(self, n_symbols):
+        # 沪市主板、深市主板、创业板、科创板按顺序轮流分配
+        prefixes = [600000, 1, 300001, 688001]
+        return [f"{prefixes[i % 4] + i // 4:06d}" for i in range(n_symbols)]
+
+    def _rng(self, symbol, salt=0):
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), salt])
+
+    @staticmethod
+    def limit_ratio(symbol):
+        """
+        涨跌停幅度：创业板和科创板20%，其余10%
+        """
+        return 0.2 if symbol.startswith(('300', '301', '688')) else 0.1
+
+    def _generate(self, symbol):
+        """
+        生成并缓存单只股票从ORIGIN到today的全部不复权K线与后复权因子
+        """
+        if symbol in self._cache:
+            return self._cache[symbol]
+
+        rng = self._rng(symbol)
+        dates = self.dates
+        n = len(dates)
+        limit = self.limit_ratio(symbol)
+
+        # 日收益率：带波动率聚集的正态随机游走，偶尔触及涨跌停
+        vol = 0.015 * np.exp(np.cumsum(rng.normal(0, 0.05, n)) * 0.1).clip(0.5, 2)
+        shocks = rng.normal(0, 1, n) * vol
+        limit_days = rng.random(n) < self.limit_prob
+        limit_sign = np.sign(rng.normal(size=n))
+
+        # 分红除息：大约每年六月一次，除息日前收盘价按股息率下调
+        dividend = np.zeros(n)
+        ex_days = np.flatnonzero((dates.month == 6) & (dates.day <= 7) & (dates.weekday == 2))
+        for day in ex_days:
+            if rng.random() < 0.7:
+                dividend[day] = rng.uniform(0.005, 0.03)
+
+        # 收盘价逐日递推（涨跌停、除息和均值回归都依赖前收盘，需要顺序计算），价格最小变动0.01
+        start_price = round(rng.uniform(3, 80), 2)
+        log_start = math.log(start_price)
+        close = [0.0] * n
+        prev_close = [0.0] * n
+        returns = [0.0] * n
+        reference = start_price
+        # 逐元素递推用Python浮点数，比逐个访问numpy标量快一个数量级
+        for i, (shock, div, at_limit, sign) in enumerate(zip(shocks.tolist(), dividend.tolist(),
+                                                             limit_days.tolist(), limit_sign.tolist())):
+            reference = reference * (1 - div)
+            prev_close[i] = round(reference, 2)
+            if at_limit:
+                returns[i] = sign * limit
+            else:
+                # 对数价格向初始价格弱回归，避免长期随机游走跌到几分钱
+                drift = -0.002 * (math.log(prev_close[i]) - log_start)
+                returns[i] = min(max(shock + drift, -limit), limit)
+            close[i] = max(round(prev_close[i] * (1 + returns[i]), 2), 0.01)
+            reference = close[i]
+        close = np.array(close)
+        prev_close = np.array(prev_close)
+        returns = np.array(returns)
+
+        upper_limit = np.round(prev_close * (1 + limit), 2)
+        lower_limit = np.round(prev_close * (1 - limit), 2)
+        open_ = np.round(prev_close * (1 + rng.normal(0, 0.3, n) * vol), 2).clip(lower_limit, upper_limit)
+        high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.4, n)) * vol), 2).clip(None, upper_limit)
+        low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.4, n)) * vol), 2).clip(lower_limit, None)
+        # 一字涨跌停：开高低收都在停板价
+        sealed = limit_days & (rng.random(n) < 0.3)
+        open_[sealed] = high[sealed] = low[sealed] = close[sealed]
+        # np.round与Python round在半分位上可能相差一分，保证最高价/最低价包住开盘价和收盘价
+        high = np.maximum(high, np.maximum(open_, close))
+        low = np.minimum(low, np.minimum(open_, close))
+
+        # 成交量（手）：对数正态分布，随波动放大，偶尔放量
+        float_shares = float(rng.integers(2, 200)) * 1e8
+        base_volume = float_shares / 100 * 0.01
+        volume = base_volume * np.exp(rng.normal(0, 0.4, n)) * (1 + np.abs(returns) / 0.02)
+        spikes = rng.random(n) < self.spike_prob
+        volume[spikes] *= rng.uniform(3, 8, spikes.sum())
+        volume[sealed] *= 0.2
+        volume = np.round(volume)
+
+        # 停牌：停牌期间不产生K线
+        trading = np.ones(n, dtype=bool)
+        for day in np.flatnonzero(rng.random(n) < self.suspension_prob):
+            trading[day:day + int(rng.integers(1, 20))] = False
+
+        bars = pd.DataFrame({
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'prev_close': prev_close,
+            'volume': volume,
+            'amount': np.round(volume * 100 * (open_ + high + low + close) / 4, 2)
+        }, index=dates)[trading]
+
+        factor_days = np.flatnonzero(dividend > 0)
+        factors = pd.Series(
+            np.concatenate([[1.0], np.cumprod(1 / (1 - dividend[factor_days]))]),
+            index=pd.DatetimeIndex([pd.Timestamp('1900-01-01')] + list(dates[factor_days]), name='date'),
+            name='hfq_factor'
+        )
+
+        self._cache[symbol] = (bars, factors, float_shares)
+        return self._cache[symbol]
+
+    def _slice(self, symbol, start_date, end_date, adjust):
+        bars, factors, _ = self._generate(symbol)
+        bars = bars.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+        return AdjustmentStore.apply(bars, factors, adjust)
+
+    def stock_zh_a_hist(self, symbol, period="daily", start_date="19700101", end_date="20500101", adjust=""):
+        """
+        模拟 ak.stock_zh_a_hist（仅支持日线）
+        """
+        bars = self._slice(symbol, start_date, end_date, adjust)
+        return pd.DataFrame({
+            '日期': bars.index.strftime('%Y-%m-%d'),
+            '股票代码': symbol,
+            '开盘': bars['open'].values,
+            '收盘': bars['close'].values,
+            '最高': bars['high'].values,
+            '最低': bars['low'].values,
+            '成交量': bars['volume'].values,
+            '成交额': bars['amount'].values,
+            '涨跌幅': np.round((bars['close'] / bars['prev_close'] - 1).values * 100, 2),
+        })
+
+    def stock_zh_a_daily(self, symbol, start_date="19900101", end_date="21000118", adjust=""):
+        """
+        模拟 ak.stock_zh_a_daily，symbol带交易所前缀，支持 adjust='hfq-factor'
+        """
+        code = symbol[2:]
+        if adjust == 'hfq-factor':
+            _, factors, _ = self._generate(code)
+            return pd.DataFrame({
+                'date': factors.index[::-1],
+                'hfq_factor': factors.values[::-1]
+            })
+        bars = self._slice(code, start_date, end_date, adjust)
+        return bars.drop(columns=['prev_close']).reset_index()
+
+    def stock_zh_a_spot(self):
+        """
+        模拟 ak.stock_zh_a_spot：全市场最新行情快照，当天停牌的股票最新价为昨收、成交量为0
+        """
+        today = self.dates[-1]
+        rows = []
+        for symbol in self.symbols:
+            bars, _, _ = self._generate(symbol)
+            if bars.empty:
+                continue
+            last = bars.iloc[-1]
+            traded = bars.index[-1] == today
+            prev_close = last['prev_close'] if traded else last['close']
+            price = last['close'] if traded else prev_close
+            change = price - prev_close
+            rows.append({
+                '代码': f"{'sh' if symbol.startswith('6') else 'sz'}{symbol}",
+                '名称': f"模拟{symbol}",
+                '最新价': price,
+                '涨跌额': round(change, 2),
+                '涨跌幅': round(change / prev_close * 100, 2),
+                '昨收': prev_close,
+                '今开': last['open'] if traded else 0.0,
+                '最高': last['high'] if traded else 0.0,
+                '最低': last['low'] if traded else 0.0,
+                '成交量': last['volume'] * 100 if traded else 0.0,
+                '成交额': last['amount'] if traded else 0.0,
+                '时间戳': '15:00:00',
+            })
+        return pd.DataFrame(rows)
+
+    def tool_trade_date_hist_sina(self):
+        """
+        模拟 ak.tool_trade_date_hist_sina：交易日历，只有 trade_date 一列
+        """
+        return pd.DataFrame({'trade_date': self.dates.date})
+
+    def stock_individual_info_em(self, symbol):
+        """
+        模拟 ak.stock_individual_info_em，返回 item/value 两列
+        """
+        bars, _, float_shares = self._generate(symbol)
+        return pd.DataFrame({
+            'item': ['股票代码', '股票简称', '总股本', '流通股', '上市时间'],
+            'value': [symbol, f"模拟{symbol}", float_shares * 1.2, float_shares, ORIGIN.replace('-', '')]
+        })
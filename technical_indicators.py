@@ -1,10 +1,162 @@
 import talib
 import numpy as np
+from contextlib import contextmanager
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+class IndicatorPrimitives:
+    """
+    指标公共中间量缓存
+
+    同一个DataFrame上的滚动最高/最低价、真实波幅、典型价格、滚动均值/标准差等
+    只计算一次，供KDJ、BOLL、ATR、CCI、WR、DMI、StochRSI等指标共用。
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.length = len(df)
+        self._cache = {}
+
+    def _get(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def invalidate(self, column):
+        """
+        丢弃依赖某一列的缓存结果（该列被重新计算后调用）
+
+        参数:
+            column: 列名
+        """
+        self._cache = {key: value for key, value in self._cache.items() if key[1] != column}
+
+    def series(self, column):
+        """
+        获取原始列或派生序列（'typical_price'、'true_range'）
+        """
+        if column == 'typical_price':
+            return self.typical_price()
+        if column == 'true_range':
+            return self.true_range()
+        return self.df[column]
+
+    def rolling_max(self, column, window):
+        """滚动最高值"""
+        return self._get(('max', column, window), lambda: self.series(column).rolling(window=window).max())
+
+    def rolling_min(self, column, window):
+        """滚动最低值"""
+        return self._get(('min', column, window), lambda: self.series(column).rolling(window=window).min())
+
+    def rolling_mean(self, column, window):
+        """滚动均值"""
+        return self._get(('mean', column, window), lambda: self.series(column).rolling(window=window).mean())
+
+    def rolling_std(self, column, window, ddof=0):
+        """滚动标准差，默认总体标准差（与talib.BBANDS一致）"""
+        return self._get(('std', column, window, ddof), lambda: self.series(column).rolling(window=window).std(ddof=ddof))
+
+    def rolling_mad(self, column, window):
+        """滚动平均绝对偏差，复用滚动均值"""
+        def compute():
+            values = self.series(column).to_numpy(dtype=float)
+            mad = np.full(len(values), np.nan)
+            if len(values) >= window:
+                windows = sliding_window_view(values, window)
+                mean = self.rolling_mean(column, window).to_numpy()[window - 1:]
+                mad[window - 1:] = np.abs(windows - mean[:, None]).mean(axis=1)
+            return pd.Series(mad, index=self.df.index)
+        return self._get(('mad', column, window), compute)
+
+    def typical_price(self):
+        """典型价格：(最高价 + 最低价 + 收盘价) / 3"""
+        return self._get(('tp', 'typical_price'), lambda: (self.df['high'] + self.df['low'] + self.df['close']) / 3)
+
+    def true_range(self):
+        """真实波幅：max(最高-最低, |最高-昨收|, |最低-昨收|)，首日为NaN"""
+        def compute():
+            prev_close = self.df['close'].shift(1)
+            ranges = pd.concat([
+                self.df['high'] - self.df['low'],
+                (self.df['high'] - prev_close).abs(),
+                (self.df['low'] - prev_close).abs()
+            ], axis=1)
+            tr = ranges.max(axis=1)
+            tr[prev_close.isna()] = np.nan
+            return tr
+        return self._get(('tr', 'true_range'), compute)
+
+
+def wilder_smooth(series, period):
+    """
+    Wilder平滑：以前period个有效值的均值为初值，之后按 1/period 递推
+
+    参数:
+        series: 待平滑的序列
+        period: 平滑周期
+
+    返回:
+        pd.Series: 平滑后的序列，初值之前为NaN
+    """
+    values = series.to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    result = np.full(len(values), np.nan)
+    if len(valid) < period:
+        return pd.Series(result, index=series.index)
+    start = valid[0] + period - 1
+    seeded = values.copy()
+    seeded[:start] = np.nan
+    seeded[start] = values[valid[0]:start + 1].mean()
+    result[start:] = pd.Series(seeded[start:]).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    return pd.Series(result, index=series.index)
+
 
 class TechnicalIndicators:
-    def __init__(self):
-        pass
+    def __init__(self, share_primitives=True):
+        """
+        参数:
+            share_primitives: 是否在一次 calculate_indicators/calculate_all_indicators 调用的多个指标间
+                共享中间量缓存，关闭时每个指标独立计算（用于对比测试）
+        """
+        self.share_primitives = share_primitives
+        self._primitives = None
+
+    def primitives(self, df):
+        """
+        获取DataFrame对应的公共中间量缓存
+
+        只有在 shared_primitives 范围内（一次批量计算中）才复用缓存；单独调用某个指标时
+        总是按当前数据新建，调用方原地修改价格后再计算不会拿到旧结果。
+
+        参数:
+            df: 包含股票数据的DataFrame
+
+        返回:
+            IndicatorPrimitives: 中间量缓存
+        """
+        cached = self._primitives
+        if cached is not None and cached.df is df and len(df) == cached.length:
+            return cached
+        return IndicatorPrimitives(df)
+
+    @contextmanager
+    def shared_primitives(self, df):
+        """
+        在一次批量计算内共享df的中间量缓存，离开范围后丢弃
+
+        参数:
+            df: 包含股票数据的DataFrame
+        """
+        if not self.share_primitives or self._primitives is not None:
+            # 已在外层范围内（或关闭共享）时不重复建立
+            yield
+            return
+        self._primitives = IndicatorPrimitives(df)
+        try:
+            yield
+        finally:
+            self._primitives = None
     
     def calculate_ma(self, df, periods=[5, 10, 20, 60]):
         """
@@ -57,8 +209,9 @@ class TechnicalIndicators:
         df_copy = df.copy()
         
         # 手动计算RSV：(收盘价 - 最近N日最低价) / (最近N日最高价 - 最近N日最低价) * 100
-        highest = df_copy['high'].rolling(window=n).max()
-        lowest = df_copy['low'].rolling(window=n).min()
+        prims = self.primitives(df)
+        highest = prims.rolling_max('high', n)
+        lowest = prims.rolling_min('low', n)
         
         # 避免除以零
         delta = highest - lowest
@@ -66,6 +219,8 @@ class TechnicalIndicators:
         delta[delta == 0] = 1
         
         rsv = (df_copy['close'] - lowest) / delta * 100
+        # 递推在numpy数组上进行，避免逐元素iloc访问
+        rsv_values = rsv.to_numpy(dtype=float)
         
         # 初始化K、D值
         k_values = [50.0] * len(df_copy)  # 初始值设为50
@@ -73,9 +228,9 @@ class TechnicalIndicators:
         
         # 计算K、D值
         for i in range(1, len(df_copy)):
-            if not pd.isna(rsv.iloc[i]):
+            if not np.isnan(rsv_values[i]):
                 # K值 = 前一日K值 * (m1-1)/m1 + 当日RSV * 1/m1
-                k_values[i] = k_values[i-1] * (m1 - 1) / m1 + rsv.iloc[i] * 1 / m1
+                k_values[i] = k_values[i-1] * (m1 - 1) / m1 + rsv_values[i] * 1 / m1
                 # D值 = 前一日D值 * (m2-1)/m2 + 当日K值 * 1/m2
                 d_values[i] = d_values[i-1] * (m2 - 1) / m2 + k_values[i] * 1 / m2
             else:
@@ -107,6 +262,8 @@ class TechnicalIndicators:
             pd.DataFrame: 包含RSI指标的DataFrame
         """
         df['RSI'] = talib.RSI(df['close'], timeperiod=timeperiod)
+        df.attrs['RSI_timeperiod'] = timeperiod
+        self.primitives(df).invalidate('RSI')
         return df
     
     def calculate_boll(self, df, timeperiod=20, nbdevup=2, nbdevdn=2):
@@ -122,7 +279,12 @@ class TechnicalIndicators:
         返回:
             pd.DataFrame: 包含布林带指标的DataFrame
         """
-        upper, middle, lower = talib.BBANDS(df['close'], timeperiod=timeperiod, nbdevup=nbdevup, nbdevdn=nbdevdn, matype=0)
+        # 中轨与标准差取自公共中间量，口径与talib.BBANDS(matype=0)一致
+        prims = self.primitives(df)
+        middle = prims.rolling_mean('close', timeperiod)
+        std = prims.rolling_std('close', timeperiod)
+        upper = middle + nbdevup * std
+        lower = middle - nbdevdn * std
         df['BOLL_Upper'] = upper
         df['BOLL_Middle'] = middle
         df['BOLL_Lower'] = lower
@@ -141,6 +303,154 @@ class TechnicalIndicators:
         df['OBV'] = talib.OBV(df['close'], df['volume'])
         return df
     
+    def calculate_atr(self, df, timeperiod=14):
+        """
+        计算ATR指标（平均真实波幅）
+        
+        参数:
+            df: 包含股票数据的DataFrame
+            timeperiod: Wilder平滑周期
+        
+        返回:
+            pd.DataFrame: 包含ATR指标的DataFrame
+        """
+        df['ATR'] = wilder_smooth(self.primitives(df).true_range(), timeperiod)
+        return df
+    
+    def calculate_cci(self, df, timeperiod=20):
+        """
+        计算CCI指标（顺势指标）
+        
+        参数:
+            df: 包含股票数据的DataFrame
+            timeperiod: 计算周期
+        
+        返回:
+            pd.DataFrame: 包含CCI指标的DataFrame
+        """
+        prims = self.primitives(df)
+        tp = prims.typical_price()
+        mad = prims.rolling_mad('typical_price', timeperiod)
+        # 平均绝对偏差为0时CCI无意义，置为NaN
+        df['CCI'] = (tp - prims.rolling_mean('typical_price', timeperiod)) / (0.015 * mad.replace(0, np.nan))
+        return df
+    
+    def calculate_wr(self, df, timeperiod=14):
+        """
+        计算威廉指标（Williams %R），取值范围 -100 ~ 0，与talib.WILLR一致
+        
+        参数:
+            df: 包含股票数据的DataFrame
+            timeperiod: 计算周期
+        
+        返回:
+            pd.DataFrame: 包含WR指标的DataFrame
+        """
+        prims = self.primitives(df)
+        highest = prims.rolling_max('high', timeperiod)
+        lowest = prims.rolling_min('low', timeperiod)
+        delta = (highest - lowest).replace(0, np.nan)
+        df['WR'] = (highest - df['close']) / delta * -100
+        return df
+    
+    def calculate_dmi(self, df, timeperiod=14):
+        """
+        计算DMI指标（+DI、-DI与ADX）
+        
+        参数:
+            df: 包含股票数据的DataFrame
+            timeperiod: Wilder平滑周期
+        
+        返回:
+            pd.DataFrame: 包含DMI指标的DataFrame
+        """
+        prims = self.primitives(df)
+        up_move = df['high'].diff()
+        down_move = -df['low'].diff()
+        plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0)
+        minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0)
+        # 首日没有前值，与真实波幅保持一致
+        plus_dm[up_move.isna()] = np.nan
+        minus_dm[down_move.isna()] = np.nan
+        
+        atr = wilder_smooth(prims.true_range(), timeperiod).replace(0, np.nan)
+        pdi = 100 * wilder_smooth(plus_dm, timeperiod) / atr
+        mdi = 100 * wilder_smooth(minus_dm, timeperiod) / atr
+        dx = 100 * (pdi - mdi).abs() / (pdi + mdi).replace(0, np.nan)
+        
+        df['DMI_PDI'] = pdi
+        df['DMI_MDI'] = mdi
+        df['DMI_ADX'] = wilder_smooth(dx, timeperiod)
+        return df
+    
+    def calculate_stoch_rsi(self, df, timeperiod=14, fastk_period=3, fastd_period=3):
+        """
+        计算随机RSI指标（StochRSI），取值范围 0 ~ 100
+        
+        参数:
+            df: 包含股票数据的DataFrame
+            timeperiod: RSI周期及其随机化窗口
+            fastk_period: K值平滑周期
+            fastd_period: D值平滑周期
+        
+        返回:
+            pd.DataFrame: 包含StochRSI指标的DataFrame
+        """
+        # 没有RSI列时先计算；已有的RSI列周期相同时复用（calculate_rsi 在 df.attrs 中记录了周期），
+        # 周期不同或未知时单独计算，不覆盖已有的RSI列
+        if 'RSI' not in df.columns:
+            df = self.calculate_rsi(df, timeperiod=timeperiod)
+        prims = self.primitives(df)
+        if df.attrs.get('RSI_timeperiod') == timeperiod:
+            rsi = prims.series('RSI')
+            highest = prims.rolling_max('RSI', timeperiod)
+            lowest = prims.rolling_min('RSI', timeperiod)
+        else:
+            rsi = pd.Series(talib.RSI(df['close'], timeperiod=timeperiod), index=df.index)
+            highest = rsi.rolling(window=timeperiod).max()
+            lowest = rsi.rolling(window=timeperiod).min()
+        delta = (highest - lowest).replace(0, np.nan)
+        stoch = (rsi - lowest) / delta * 100
+        
+        k = stoch.rolling(window=fastk_period).mean()
+        df['STOCHRSI_K'] = k
+        df['STOCHRSI_D'] = k.rolling(window=fastd_period).mean()
+        return df
+    
+    # 指标名称 -> 计算方法名，供按需计算使用
+    INDICATORS = {
+        'MA': 'calculate_ma',
+        'MACD': 'calculate_macd',
+        'KDJ': 'calculate_kdj',
+        'RSI': 'calculate_rsi',
+        'BOLL': 'calculate_boll',
+        'OBV': 'calculate_obv',
+        'ATR': 'calculate_atr',
+        'CCI': 'calculate_cci',
+        'WR': 'calculate_wr',
+        'DMI': 'calculate_dmi',
+        'STOCHRSI': 'calculate_stoch_rsi',
+    }
+    
+    def calculate_indicators(self, df, names):
+        """
+        按名称计算指定的技术指标，同一DataFrame上的中间量只计算一次
+        
+        参数:
+            df: 包含股票数据的DataFrame
+            names: 指标名称列表，取值见 TechnicalIndicators.INDICATORS
+        
+        返回:
+            pd.DataFrame: 包含所选技术指标的DataFrame
+        """
+        for name in names:
+            if name not in self.INDICATORS:
+                raise ValueError(f"未知的技术指标: {name}")
+        with self.shared_primitives(df):
+            for name in names:
+                df = getattr(self, self.INDICATORS[name])(df)
+        return df
+    
     def calculate_all_indicators(self, df):
         """
         计算所有技术指标
@@ -151,10 +461,11 @@ class TechnicalIndicators:
         返回:
             pd.DataFrame: 包含所有技术指标的DataFrame
         """
-        df = self.calculate_ma(df)
-        df = self.calculate_macd(df)
-        df = self.calculate_kdj(df)
-        df = self.calculate_rsi(df)
-        df = self.calculate_boll(df)
-        df = self.calculate_obv(df)
+        with self.shared_primitives(df):
+            df = self.calculate_ma(df)
+            df = self.calculate_macd(df)
+            df = self.calculate_kdj(df)
+            df = self.calculate_rsi(df)
+            df = self.calculate_boll(df)
+            df = self.calculate_obv(df)
         return df
\ No newline at end of file
@@ -0,0 +1,107 @@
+import io
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from synthetic_market import SyntheticMarket
+from data_fetcher import DataFetcher
+from adjustment_store import AdjustmentStore
+
+
+class CountingProvider:
+    """
+    记录K线接口的调用参数，可以让接下来的若干次K线请求返回空数据（模拟接口限流）
+    """
+
+    def __init__(self, market):
+        self.market = market
+        self.bar_calls = []
+        self.empty_responses = 0
+
+    def __getattr__(self, name):
+        return getattr(self.market, name)
+
+    def stock_zh_a_hist(self, symbol, **kwargs):
+        self.bar_calls.append((symbol, kwargs['start_date'], kwargs['end_date']))
+        if self.empty_responses > 0:
+            return pd.DataFrame()
+        return self.market.stock_zh_a_hist(symbol, **kwargs)
+
+    def stock_zh_a_daily(self, symbol, **kwargs):
+        if kwargs.get('adjust') != 'hfq-factor' and self.empty_responses > 0:
+            self.empty_responses -= 1
+            return pd.DataFrame()
+        return self.market.stock_zh_a_daily(symbol, **kwargs)
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+# 初始化模块（合成行情，无需联网）
+market = SyntheticMarket(n_symbols=4, today='2024-06-28')
+provider = CountingProvider(market)
+fetcher = DataFetcher(data_dir=tempfile.mkdtemp(), provider=provider)
+symbol = market.symbols[0]
+
+print("\n=== 测试不复权K线与复权因子存储 ===")
+
+# 前复权、后复权、不复权之间的关系
+raw = quiet(fetcher.fetch_stock_data, symbol, '2023-01-01', '2023-06-30', adjust='')
+qfq = quiet(fetcher.fetch_stock_data, symbol, '2023-01-01', '2023-06-30', adjust='qfq')
+hfq = quiet(fetcher.fetch_stock_data, symbol, '2023-01-01', '2023-06-30', adjust='hfq')
+_, factors, _ = market._generate(symbol)
+bar_factors = factors.reindex(raw.index, method='ffill')
+np.testing.assert_allclose(hfq['close'], raw['close'] * bar_factors)
+np.testing.assert_allclose(qfq['close'], hfq['close'] / factors.iloc[-1])
+np.testing.assert_array_equal(qfq['volume'], raw['volume'])
+try:
+    AdjustmentStore.apply(raw, factors, 'bfq')
+except ValueError as e:
+    print(f"✓ {e}")
+else:
+    raise AssertionError("未知的复权方式应报错")
+print("✓ 前复权/后复权/不复权由因子生成")
+
+# 扩大日期范围时只请求本地没有覆盖的日期段
+assert len(provider.bar_calls) == 1
+quiet(fetcher.fetch_stock_data, symbol, '2022-07-01', '2023-12-31')
+assert provider.bar_calls[1:] == [(symbol, '20220701', '20221231'), (symbol, '20230701', '20231231')]
+quiet(fetcher.fetch_stock_data, symbol, '2022-09-01', '2023-09-30')
+assert len(provider.bar_calls) == 3
+print("✓ 只请求未覆盖的日期段")
+
+# 除权除息：只刷新复权因子，不重新下载K线，前复权历史整体按比例调整
+before = quiet(fetcher.fetch_stock_data, symbol, '2022-07-01', '2023-12-31')
+calls = len(provider.bar_calls)
+bars, factors, float_shares = market._cache[symbol]
+new_factors = pd.concat([factors, pd.Series([factors.iloc[-1] * 1.05], index=pd.DatetimeIndex(['2024-01-02']))])
+market._cache[symbol] = (bars, new_factors.rename('hfq_factor'), float_shares)
+meta = fetcher.store.load_meta(symbol)
+meta['factors_checked'] = '2000-01-01'
+fetcher.store.save_meta(symbol, meta)
+after = quiet(fetcher.fetch_stock_data, symbol, '2022-07-01', '2023-12-31')
+assert len(provider.bar_calls) == calls
+np.testing.assert_allclose(after['close'], before['close'] / 1.05)
+raw_after = quiet(fetcher.fetch_stock_data, symbol, '2022-07-01', '2023-12-31', adjust='')
+np.testing.assert_allclose(raw_after['close'], bars.loc['2022-07-01':'2023-12-31', 'close'])
+print("✓ 除权除息只刷新复权因子，前复权历史按比例调整")
+
+# 接口临时返回空数据时不记为已覆盖，下次重新请求
+other = market.symbols[1]
+provider.empty_responses = 1
+assert quiet(fetcher.fetch_stock_data, other, '2023-01-01', '2023-03-31') is None
+assert 'start' not in fetcher.store.load_meta(other)
+df = quiet(fetcher.fetch_stock_data, other, '2023-01-01', '2023-03-31')
+assert df is not None and len(df) > 50
+print("✓ 空响应不标记为已覆盖")
+
+# 只含周末的日期段没有行情，记为已覆盖，不再重复请求
+calls = len(provider.bar_calls)
+quiet(fetcher.fetch_stock_data, other, '2023-04-01', '2023-04-02')
+quiet(fetcher.fetch_stock_data, other, '2023-04-01', '2023-04-02')
+assert len(provider.bar_calls) == calls + 1
+print("✓ 非交易日期段只请求一次")
+
+print("\n=== 存储测试完成 ===")
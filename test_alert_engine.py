@@ -0,0 +1,56 @@
+from synthetic_market import SyntheticMarket
+from technical_indicators import TechnicalIndicators
+from alert_engine import AlertEngine, compile_rule
+
+# 初始化模块（合成行情，无需联网）
+market = SyntheticMarket(n_symbols=20, today='2024-06-28')
+ti_calculator = TechnicalIndicators()
+frames = {}
+for symbol in market.symbols:
+    bars, _, _ = market._generate(symbol)
+    frames[symbol] = ti_calculator.calculate_all_indicators(bars.loc['2023-01-01':].copy())
+
+print("\n=== 测试规则告警引擎 ===")
+
+# 语法错误在编译时报出
+for bad_rule in ['MACD >', 'RSI and KDJ_J < 0', 'foo(close, 3) > 1', 'ref(close, 0) > 1']:
+    try:
+        compile_rule(bad_rule)
+    except ValueError as e:
+        print(f"✓ {e}")
+    else:
+        raise AssertionError(f"规则应报错: {bad_rule}")
+
+# 与逐只股票的pandas写法结果一致
+engine = AlertEngine(history_bars=10 ** 6)
+engine.add_rule('MACD金叉', 'MACD crosses above MACD_Signal and RSI < 40')
+engine.add_rule('跌破下轨放量', 'close crosses below BOLL_Lower and any(volume > 2 * mean(volume, 20), 3)')
+alerts = engine.evaluate(frames)
+
+expected_golden = 0
+expected_boll = 0
+for df in frames.values():
+    golden = (df['MACD'] > df['MACD_Signal']) & (df['MACD'].shift() <= df['MACD_Signal'].shift()) & (df['RSI'] < 40)
+    spike = (df['volume'] > 2 * df['volume'].rolling(20).mean()).astype(int).rolling(3).max() > 0
+    boll = (df['close'] < df['BOLL_Lower']) & (df['close'].shift() >= df['BOLL_Lower'].shift()) & spike
+    expected_golden += golden.sum()
+    expected_boll += boll.sum()
+assert (alerts['rule'] == 'MACD金叉').sum() == expected_golden
+assert (alerts['rule'] == '跌破下轨放量').sum() == expected_boll
+print(f"✓ 向量化结果与逐只计算一致: {len(alerts)} 条告警")
+
+# 再次计算只检查最后一根K线，已记录的告警不重复
+assert engine.evaluate(frames).empty
+print("✓ 告警去重")
+
+# 逐根K线到来时增量计算，结果与一次性计算相同
+incremental = AlertEngine(history_bars=10 ** 6)
+incremental.add_rule('MACD金叉', 'MACD crosses above MACD_Signal and RSI < 40')
+incremental.add_rule('跌破下轨放量', 'close crosses below BOLL_Lower and any(volume > 2 * mean(volume, 20), 3)')
+for end in range(100, 0, -20):
+    incremental.evaluate({symbol: df.iloc[:-end] for symbol, df in frames.items()})
+incremental.evaluate(frames)
+assert len(incremental.alert_log()) == len(engine.alert_log())
+print("✓ 增量计算与一次性计算一致")
+
+print("\n=== 规则告警引擎测试完成 ===")
@@ -0,0 +1,43 @@
+import os
+import io
+import tempfile
+import contextlib
+import pandas as pd
+from synthetic_market import SyntheticMarket
+from data_fetcher import DataFetcher
+from technical_indicators import TechnicalIndicators
+from batch_compute import run_batch, output_path
+
+if __name__ == "__main__":
+    # 初始化模块（合成行情，无需联网），先把K线缓存到本地
+    market = SyntheticMarket(n_symbols=12, today='2024-06-28')
+    data_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    fetcher = DataFetcher(data_dir=data_dir, provider=market)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for symbol in market.symbols:
+            fetcher.fetch_stock_data(symbol, '2018-01-01', '2024-06-28')
+
+    print("\n=== 测试批量计算 ===")
+
+    summary = run_batch(market.symbols, '2022-01-01', '2024-06-28', output_dir, data_dir=data_dir,
+                        chunk_size=5, workers=2)
+    assert summary['written'] == len(market.symbols)
+    print("✓ 批量计算完成")
+
+    # 结果与单只股票直接计算一致
+    result = pd.read_parquet(output_dir)
+    df = fetcher.fetch_stock_data('600000', '2018-01-01', '2024-06-28')
+    expected = TechnicalIndicators().calculate_all_indicators(df).loc['2022-01-01':]
+    actual = result[result['symbol'] == '600000'].drop(columns='symbol')
+    pd.testing.assert_frame_equal(actual[expected.columns], expected, check_freq=False)
+    print("✓ 批量结果与直接计算一致")
+
+    # 删除部分输出模拟中断，重新运行只处理缺失的股票
+    os.remove(output_path(output_dir, market.symbols[0]))
+    summary = run_batch(market.symbols, '2022-01-01', '2024-06-28', output_dir, data_dir=data_dir,
+                        chunk_size=5, workers=2)
+    assert summary['skipped'] == len(market.symbols) - 1 and summary['written'] == 1
+    print("✓ 中断后续跑")
+
+    print("\n=== 批量计算测试完成 ===")
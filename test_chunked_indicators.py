@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from synthetic_market import SyntheticMarket
+from technical_indicators import TechnicalIndicators
+from chunked_indicators import ChunkedIndicators, calculate_all_indicators_chunked, iter_chunks
+
+# 初始化模块（合成行情，无需联网），约6000根K线
+market = SyntheticMarket(n_symbols=1, today='2024-06-28')
+bars, _, _ = market._generate(market.symbols[0])
+df = bars[['open', 'high', 'low', 'close', 'volume']]
+
+print("\n=== 测试分块计算技术指标 ===")
+
+# 不同的块大小，拼接结果与整段一次计算逐位相同
+full = calculate_all_indicators_chunked(df, chunk_size=len(df))
+for chunk_size in [7, 26, 59, 60, 61, 1000, 2500]:
+    chunked = calculate_all_indicators_chunked(df, chunk_size=chunk_size)
+    pd.testing.assert_frame_equal(chunked, full, check_exact=True)
+    print(f"✓ 块大小 {chunk_size}: 与整段计算逐位相同")
+
+# 逐根K线处理（预热期跨越很多块）
+head = df.iloc[:200]
+pd.testing.assert_frame_equal(calculate_all_indicators_chunked(head, chunk_size=1),
+                              calculate_all_indicators_chunked(head, chunk_size=len(head)), check_exact=True)
+print("✓ 块大小 1: 与整段计算逐位相同")
+
+# 块大小不固定（如按文件分段读入）时同样一致
+calculator = ChunkedIndicators()
+sizes = [3, 100, 1, 40, 2000]
+pieces = []
+start = 0
+for size in sizes * (len(df) // sum(sizes) + 1):
+    if start >= len(df):
+        break
+    pieces.append(calculator.update(df.iloc[start:start + size]))
+    start += size
+pd.testing.assert_frame_equal(pd.concat(pieces), full, check_exact=True)
+print("✓ 不等长分块与整段计算逐位相同")
+
+# 与 calculate_all_indicators 对比：KDJ、OBV逐位相同，其余只有浮点舍入误差
+expected = TechnicalIndicators().calculate_all_indicators(df.copy())
+for column in ['KDJ_K', 'KDJ_D', 'KDJ_J', 'OBV']:
+    np.testing.assert_array_equal(full[column].to_numpy(), expected[column].to_numpy())
+for column in ['MA5', 'MA10', 'MA20', 'MA60', 'MACD', 'MACD_Signal', 'MACD_Hist', 'RSI',
+               'BOLL_Upper', 'BOLL_Middle', 'BOLL_Lower']:
+    np.testing.assert_array_equal(full[column].isna().to_numpy(), expected[column].isna().to_numpy())
+    np.testing.assert_allclose(full[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9, atol=1e-9)
+print("✓ 与 calculate_all_indicators 结果一致")
+
+# 逐块产出，适合从磁盘分段读取后流式写出
+rows = sum(len(part) for part in ChunkedIndicators().run(iter_chunks(df, 500)))
+assert rows == len(df)
+print("✓ 流式逐块产出")
+
+print("\n=== 分块计算测试完成 ===")
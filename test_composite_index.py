@@ -0,0 +1,104 @@
+import io
+import time
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from synthetic_market import SyntheticMarket
+from data_fetcher import DataFetcher
+from technical_indicators import TechnicalIndicators
+from visualizer import Visualizer
+from composite_index import CompositeBuilder
+
+# 初始化模块（合成行情，无需联网），先把K线缓存到本地
+market = SyntheticMarket(n_symbols=30, today='2024-06-28', suspension_prob=0.01)
+data_dir = tempfile.mkdtemp()
+fetcher = DataFetcher(data_dir=data_dir, provider=market)
+with contextlib.redirect_stdout(io.StringIO()):
+    for symbol in market.symbols:
+        fetcher.fetch_stock_data(symbol, '2020-01-01', '2024-06-28')
+builder = CompositeBuilder(data_dir=data_dir, provider=market)
+
+print("\n=== 测试自定义指数合成 ===")
+
+# 单只股票的等权指数就是按基点缩放的股价
+symbol = market.symbols[0]
+with contextlib.redirect_stdout(io.StringIO()):
+    stock = fetcher.fetch_stock_data(symbol, '2020-01-01', '2024-06-28')
+single = builder.build([symbol], rebalance='M')
+np.testing.assert_allclose(single['close'].to_numpy(), (stock['close'] / stock['close'].iloc[0] * 1000).to_numpy())
+print("✓ 单只股票指数与股价走势一致")
+
+# 不调仓时指数 = 基点 x 各成分股初始权重 x 涨幅之和；停牌日沿用停牌前价格
+basket = market.symbols[:5]
+with contextlib.redirect_stdout(io.StringIO()):
+    closes = pd.DataFrame({s: fetcher.fetch_stock_data(s, '2020-01-01', '2024-06-28')['close'] for s in basket})
+buy_hold = builder.build(basket, rebalance=None)
+filled = closes.ffill()
+expected = (filled / filled.iloc[0]).mean(axis=1) * 1000
+np.testing.assert_allclose(buy_hold['close'].to_numpy(), expected.to_numpy())
+assert not buy_hold.isna().any().any() and (buy_hold['high'] >= buy_hold['close'] - 1e-9).all()
+assert (buy_hold['constituents'] < len(basket)).any()
+# 成交额为当天有成交的成分股成交额之和
+amounts = pd.DataFrame({s: builder.store.load_bars(s)['成交额'] for s in basket}).reindex(buy_hold.index)
+np.testing.assert_allclose(buy_hold['amount'].to_numpy(), amounts.sum(axis=1).to_numpy())
+assert (buy_hold['amount'] > 0).all()
+print(f"✓ 停牌成分股处理正确（{(buy_hold['constituents'] < len(basket)).sum()} 个交易日有成分股停牌）")
+
+# 按月调仓：与逐个调仓区间计算的结果一致，调仓日点位连续
+monthly = builder.build(basket, rebalance='M')
+level = 1000.0
+expected = []
+for _, month in filled.groupby(filled.index.to_period('M')):
+    base_prices = filled.loc[:month.index[0]].iloc[-2] if expected else month.iloc[0]
+    values = level * (month / base_prices).mean(axis=1)
+    expected.append(values)
+    level = values.iloc[-1]
+np.testing.assert_allclose(monthly['close'].to_numpy(), pd.concat(expected).to_numpy())
+print("✓ 按月调仓结果正确")
+
+# 流通市值加权：首日涨幅等于按流通市值加权的成分股涨幅
+cap = builder.build(basket, weights='float_cap', start_date='2023-01-01')
+shares = builder.float_shares(basket)
+with contextlib.redirect_stdout(io.StringIO()):
+    raw = pd.DataFrame({s: fetcher.fetch_stock_data(s, '2022-06-01', '2024-06-28', adjust='')['close'] for s in basket})
+    adj = pd.DataFrame({s: fetcher.fetch_stock_data(s, '2022-06-01', '2024-06-28')['close'] for s in basket}).ffill()
+raw = raw.ffill().loc[:cap.index[0]].iloc[-1]
+w = raw * shares / (raw * shares).sum()
+first_return = (w * adj.loc[cap.index[1]] / adj.loc[cap.index[0]]).sum()
+assert abs(cap['close'].iloc[1] / 1000 - first_return) < 1e-12
+print("✓ 流通市值加权正确")
+
+# 固定权重，直接用于指标计算和组合图表
+fixed = builder.build(basket, weights={basket[0]: 0.5, basket[1]: 0.3, basket[2]: 0.2})
+df = TechnicalIndicators().calculate_all_indicators(fixed)
+fig = Visualizer().plot_combined_charts(df)
+assert df['MA20'].notna().any() and len(fig.data) > 0
+print("✓ 合成指数可直接计算指标和绘图")
+
+# 成分股都没有成交额数据时合成指数的成交额为NaN，而不是0
+no_amount = builder.store.load_bars(basket[4]).drop(columns=['成交额'])
+builder.store._write_csv(no_amount, builder.store.path('bars', basket[4]))
+builder.load([basket[4]])
+assert builder.build([basket[4]])['amount'].isna().all()
+mixed = builder.build(basket[3:])
+np.testing.assert_allclose(mixed['amount'].to_numpy(), amounts[basket[3]].reindex(mixed.index).to_numpy())
+print("✓ 没有成交额数据时为NaN")
+
+# 数百个指数批量合成；成分股数据更新后只重新读取变化的股票
+rng = np.random.default_rng(0)
+baskets = {f"组合{i}": {'symbols': list(rng.choice(market.symbols, 10, replace=False)), 'rebalance': 'M'}
+           for i in range(300)}
+start = time.perf_counter()
+results = builder.build_many(baskets)
+print(f"✓ 合成 {len(results)} 个指数耗时 {time.perf_counter() - start:.2f}s")
+
+bars = builder.store.load_bars(basket[0])
+bars.loc[bars.index[-1], 'close'] *= 1.05
+builder.store.save_bars(basket[0], bars)
+assert builder.load(market.symbols) == [basket[0]]
+updated = builder.build(basket, rebalance=None)
+assert updated['close'].iloc[-1] > buy_hold['close'].iloc[-1]
+print("✓ 成分股更新后只重新读取变化的股票")
+
+print("\n=== 自定义指数合成测试完成 ===")
@@ -0,0 +1,76 @@
+import io
+import time
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from synthetic_market import SyntheticMarket
+from data_fetcher import DataFetcher
+from composite_index import CompositeBuilder
+from visualizer import Visualizer
+from cross_section import (RollingCovariance, daily_returns, rolling_matrices, rolling_beta,
+                           relative_strength, relative_strength_rank)
+
+# 初始化模块（合成行情，无需联网），先把K线缓存到本地
+market = SyntheticMarket(n_symbols=40, today='2024-06-28', suspension_prob=0.01)
+data_dir = tempfile.mkdtemp()
+fetcher = DataFetcher(data_dir=data_dir, provider=market)
+with contextlib.redirect_stdout(io.StringIO()):
+    for symbol in market.symbols:
+        fetcher.fetch_stock_data(symbol, '2022-01-01', '2024-06-28')
+builder = CompositeBuilder(data_dir=data_dir, provider=market)
+closes = builder.get_panel(market.symbols, 'close', start_date='2022-01-01')
+returns = daily_returns(closes)
+
+print("\n=== 测试滚动相关性与相对强弱 ===")
+
+# 增量计算的矩阵与pandas逐对计算一致（含停牌缺失值）
+window = 60
+start = time.perf_counter()
+expected_corr = returns.rolling(window).corr()
+expected_cov = returns.rolling(window).cov()
+pandas_seconds = time.perf_counter() - start
+
+check_dates = returns.index[[window - 1, 200, 400, -1]]
+start = time.perf_counter()
+matrices = dict(rolling_matrices(returns, window=window))
+incremental_seconds = time.perf_counter() - start
+for date in check_dates:
+    pd.testing.assert_frame_equal(matrices[date], expected_corr.loc[date], check_names=False, atol=1e-8)
+covariances = dict(rolling_matrices(returns, window=window, kind='cov', dates=check_dates))
+for date in check_dates:
+    pd.testing.assert_frame_equal(covariances[date], expected_cov.loc[date], check_names=False, atol=1e-12)
+print(f"✓ 与pandas结果一致（{len(matrices)} 个交易日: 增量 {incremental_seconds:.2f}s, pandas {pandas_seconds:.2f}s）")
+
+# 实时逐日更新
+rolling = RollingCovariance(returns.columns, window=window)
+for row in returns.to_numpy():
+    rolling.update(row)
+pd.testing.assert_frame_equal(rolling.correlation(), matrices[returns.index[-1]])
+print("✓ 逐日更新得到最新矩阵")
+
+# 相对合成指数的贝塔
+benchmark = builder.build(market.symbols, start_date='2022-01-01')['close']
+benchmark_returns = benchmark.pct_change()
+beta = rolling_beta(returns, benchmark_returns, window=window, min_periods=20)
+date = returns.index[-1]
+for symbol in market.symbols[:5]:
+    pair = pd.concat([returns[symbol], benchmark_returns], axis=1).iloc[-window:].dropna()
+    expected_beta = np.cov(pair.iloc[:, 0], pair.iloc[:, 1])[0, 1] / pair.iloc[:, 1].var()
+    assert abs(beta.loc[date, symbol] - expected_beta) < 1e-8
+assert beta.iloc[-1].notna().all()
+print(f"✓ 滚动贝塔（最新中位数 {beta.iloc[-1].median():.2f}）")
+
+# 相对强弱排名
+strength = relative_strength(closes, lookback=20, benchmark=benchmark)
+rank = relative_strength_rank(closes, lookback=20, benchmark=benchmark)
+latest = strength.iloc[-1].dropna()
+assert rank.iloc[-1][latest.idxmax()] == 1 and rank.iloc[-1].max() == len(latest)
+print(f"✓ 相对强弱排名（最强: {latest.idxmax()}）")
+
+# 大矩阵热力图
+fig = Visualizer().plot_correlation_heatmap(matrices[returns.index[-1]].fillna(0))
+assert fig.data[0].z.dtype == np.int8
+print(f"✓ 热力图（{len(fig.to_json()) // 1024} KB）")
+
+print("\n=== 滚动相关性与相对强弱测试完成 ===")
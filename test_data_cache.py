@@ -0,0 +1,58 @@
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from data_fetcher import DataFetcher
+from data_cache import SharedDataCache
+from synthetic_market import SyntheticMarket
+
+
+class SlowFetcher(DataFetcher):
+    """每次获取都稍作停顿并计数，便于观察并发请求是否被合并"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def fetch_stock_data(self, *args, **kwargs):
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return super().fetch_stock_data(*args, **kwargs)
+
+
+# 初始化模块（合成行情，无需联网）
+market = SyntheticMarket(n_symbols=4, today='2024-06-28')
+fetcher = SlowFetcher(data_dir=tempfile.mkdtemp(), provider=market)
+cache = SharedDataCache(fetcher)
+
+print("\n=== 测试共享数据缓存 ===")
+
+# 16个会话同时请求同一只股票，只应获取一次
+with ThreadPoolExecutor(max_workers=16) as pool:
+    frames = list(pool.map(lambda _: cache.fetch_stock_data('600000', '2023-01-01', '2023-12-31'), range(16)))
+assert fetcher.calls == 1
+assert all(frame.equals(frames[0]) for frame in frames)
+stats = cache.stats()
+assert stats['fetches'] == 1 and stats['hits'] + stats['dedupe_hits'] == 15
+print(f"✓ 并发请求合并为一次获取: {stats}")
+
+# 调用方添加指标列不影响共享数据
+frames[0]['MA5'] = frames[0]['close'].rolling(5).mean()
+assert 'MA5' not in cache.fetch_stock_data('600000', '2023-01-01', '2023-12-31').columns
+frames[1].loc[frames[1].index[-1], 'close'] = -1.0
+frames[2]['volume'] *= 0
+shared = cache.fetch_stock_data('600000', '2023-01-01', '2023-12-31')
+assert shared['close'].iloc[-1] > 0 and (shared['volume'] > 0).all()
+assert frames[0]['close'].iloc[-1] > 0
+print("✓ 共享数据只读")
+
+# 超过内存上限时按LRU淘汰
+small = SharedDataCache(fetcher, max_bytes=int(stats['bytes'] * 1.5))
+small.fetch_stock_data('600000', '2023-01-01', '2023-12-31')
+small.fetch_stock_data('000001', '2023-01-01', '2023-12-31')
+assert small.stats()['entries'] == 1 and small.stats()['evictions'] == 1
+print("✓ 超过内存上限时淘汰旧数据")
+
+print("\n=== 共享数据缓存测试完成 ===")
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import talib
+from synthetic_market import SyntheticMarket
+from technical_indicators import TechnicalIndicators
+
+# 初始化模块（合成行情，无需联网）
+market = SyntheticMarket(n_symbols=1, today='2024-06-28')
+bars, _, _ = market._generate(market.symbols[0])
+df = bars.loc['2019-01-01':, ['open', 'high', 'low', 'close', 'volume']].copy()
+high, low, close = df['high'], df['low'], df['close']
+ti_calculator = TechnicalIndicators()
+
+print("\n=== 测试扩展技术指标 ===")
+
+names = list(TechnicalIndicators.INDICATORS)
+result = ti_calculator.calculate_indicators(df.copy(), names)
+
+# ATR、CCI、WR与talib一致
+np.testing.assert_allclose(result['ATR'], talib.ATR(high, low, close, timeperiod=14), rtol=1e-10, atol=1e-10)
+np.testing.assert_allclose(result['CCI'], talib.CCI(high, low, close, timeperiod=20), rtol=1e-8, atol=1e-8)
+np.testing.assert_allclose(result['WR'], talib.WILLR(high, low, close, timeperiod=14), rtol=1e-10, atol=1e-10)
+print("✓ ATR、CCI、WR与talib一致")
+
+# 布林带与talib.BBANDS相差在1e-10以内
+upper, middle, lower = talib.BBANDS(close, timeperiod=20, nbdevup=2, nbdevdn=2, matype=0)
+for column, expected in [('BOLL_Upper', upper), ('BOLL_Middle', middle), ('BOLL_Lower', lower)]:
+    np.testing.assert_allclose(result[column], expected, rtol=0, atol=1e-10)
+print("✓ BOLL与talib.BBANDS一致")
+
+# DMI初值口径与talib不同，差异随K线数指数衰减，预热300根K线后一致
+warm = slice(300, None)
+np.testing.assert_allclose(result['DMI_PDI'][warm], talib.PLUS_DI(high, low, close, timeperiod=14)[warm], atol=1e-6)
+np.testing.assert_allclose(result['DMI_MDI'][warm], talib.MINUS_DI(high, low, close, timeperiod=14)[warm], atol=1e-6)
+np.testing.assert_allclose(result['DMI_ADX'][warm], talib.ADX(high, low, close, timeperiod=14)[warm], atol=1e-6)
+print("✓ DMI预热后与talib一致")
+
+# 共享中间量与各指标独立计算结果相同
+independent = TechnicalIndicators(share_primitives=False).calculate_indicators(df.copy(), names)
+pd.testing.assert_frame_equal(result, independent)
+print("✓ 共享中间量结果与独立计算相同")
+
+# 原地修改价格后再次计算，不会使用旧的中间量
+frame = df.copy()
+ti_calculator.calculate_boll(frame)
+ti_calculator.calculate_kdj(frame)
+frame['close'] *= 2
+frame['high'] *= 2
+frame['low'] *= 2
+ti_calculator.calculate_boll(frame)
+ti_calculator.calculate_kdj(frame)
+np.testing.assert_allclose(frame['BOLL_Middle'], 2 * result['BOLL_Middle'])
+np.testing.assert_allclose(frame['KDJ_K'], result['KDJ_K'])
+ti_calculator.calculate_indicators(frame, ['WR', 'CCI'])
+np.testing.assert_allclose(frame['WR'], result['WR'], atol=1e-10)
+print("✓ 原地修改价格后重新计算")
+
+# 已有RSI列的周期与StochRSI不同时不复用
+frame = ti_calculator.calculate_rsi(df.copy(), timeperiod=14)
+rsi14 = frame['RSI'].copy()
+ti_calculator.calculate_stoch_rsi(frame, timeperiod=21)
+expected = ti_calculator.calculate_stoch_rsi(df.copy(), timeperiod=21)
+pd.testing.assert_series_equal(frame['STOCHRSI_K'], expected['STOCHRSI_K'])
+pd.testing.assert_series_equal(frame['RSI'], rsi14)
+print("✓ StochRSI只复用周期相同的RSI列")
+
+print("\n=== 扩展技术指标测试完成 ===")
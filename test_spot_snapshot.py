@@ -0,0 +1,119 @@
+import io
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from synthetic_market import SyntheticMarket
+from spot_snapshot import SpotSnapshot, last_trade_date
+from data_fetcher import DataFetcher
+from data_cache import SharedDataCache
+
+
+class CountingMarket(SyntheticMarket):
+    """统计全市场快照的下载次数"""
+
+    spot_calls = 0
+
+    def stock_zh_a_spot(self):
+        self.spot_calls += 1
+        return super().stock_zh_a_spot()
+
+
+class DelayedMarket(CountingMarket):
+    """K线接口只提供到bars_until的数据，模拟盘中历史K线接口还没有当天的数据"""
+
+    bars_until = None
+
+    def _slice(self, symbol, start_date, end_date, adjust):
+        if self.bars_until is not None:
+            end_date = min(pd.Timestamp(end_date), pd.Timestamp(self.bars_until))
+        return super()._slice(symbol, start_date, end_date, adjust)
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+# 初始化模块（合成行情，无需联网）
+market = CountingMarket(n_symbols=300, today='2024-06-28')
+snapshot = SpotSnapshot(market, interval=60)
+
+print("\n=== 测试全市场行情快照 ===")
+
+# 200只自选股只下载一次全市场行情
+watchlist = market.symbols[:200]
+quotes = snapshot.quotes(watchlist + ['999999'])
+for symbol in watchlist[:5]:
+    snapshot.get(symbol)
+assert market.spot_calls == 1
+assert quotes.loc[watchlist, 'close'].notna().all()
+assert pd.isna(quotes.loc['999999', 'name']) and pd.isna(quotes.loc['999999', 'close'])
+print("✓ 200只自选股一次下载")
+
+# 与当天K线一致，带不带交易所前缀都能查询
+bars, _, _ = market._generate('600000')
+assert snapshot.get('sh600000')['close'] == bars['close'].iloc[-1]
+print("✓ 快照数据与K线一致")
+
+# 更新缓存中当天的临时K线
+cache = SharedDataCache(DataFetcher(data_dir=tempfile.mkdtemp(), provider=market))
+df = cache.fetch_stock_data('600000', '2024-01-01', '2024-06-28')
+key = ('600000', '2024-01-01', '2024-06-28', 'qfq')
+stale, size, fetched_at = cache._entries[key]
+cache._entries[key] = (stale.iloc[:-1], size, fetched_at)  # 模拟盘中缓存还没有当天K线
+assert cache.update_provisional_bars(snapshot) == 1
+latest = cache.fetch_stock_data('600000', '2024-01-01', '2024-06-28')
+assert latest.index[-1] == pd.Timestamp('2024-06-28')
+assert latest['close'].iloc[-1] == df['close'].iloc[-1]
+assert market.spot_calls == 1
+print("✓ 缓存中当天K线已更新")
+
+# 当天除权除息：缓存中的前复权历史按新因子重新计算，当天价格不变
+store = cache.fetcher.store
+factors = store.load_factors('600000')
+store.save_factors('600000', pd.concat([factors, pd.Series([factors.iloc[-1] * 1.1],
+                                                           index=pd.DatetimeIndex(['2024-06-28']))]))
+assert cache.update_provisional_bars(snapshot) == 1
+latest = cache.fetch_stock_data('600000', '2024-01-01', '2024-06-28')
+np.testing.assert_allclose(latest['close'].iloc[:-1], df['close'].iloc[:-1] / 1.1)
+assert latest['close'].iloc[-1] == df['close'].iloc[-1]
+print("✓ 除权除息日前复权历史重新计算")
+
+# 快照不带日期，交易日期取最近一个交易日：周末、开盘前、节假日都对应上一个交易日
+assert snapshot.trade_date == pd.Timestamp('2024-06-28')
+assert last_trade_date('2026-10-19 08:00') == pd.Timestamp('2026-10-16')
+assert last_trade_date('2026-10-19 10:00') == pd.Timestamp('2026-10-19')
+assert last_trade_date('2026-10-18 12:00') == pd.Timestamp('2026-10-16')
+calendar = pd.bdate_range('2026-09-01', '2026-12-31')
+calendar = calendar[(calendar < '2026-10-01') | (calendar > '2026-10-08')]
+assert last_trade_date('2026-10-06 10:00', calendar) == pd.Timestamp('2026-09-30')
+print("✓ 交易日期按交易日历确定")
+
+# 历史K线接口没有最新交易日的数据时用快照补临时K线，只在返回结果中，不写入本地
+delayed = DelayedMarket(n_symbols=4, today='2024-06-28')
+fetcher = DataFetcher(data_dir=tempfile.mkdtemp(), provider=delayed)
+today = datetime.now().strftime('%Y-%m-%d')
+quiet(fetcher.fetch_stock_data, '600000', '2024-01-01', '2024-06-27')
+delayed.bars_until = '2024-06-27'
+live = quiet(fetcher.fetch_stock_data, '600000', '2024-01-01', today)
+assert live.index[-1] == pd.Timestamp('2024-06-28') and live.index.is_unique
+assert live['close'].iloc[-1] == fetcher.spot.get('600000')['close']
+assert fetcher.store.load_bars('600000').index[-1] == pd.Timestamp('2024-06-27')
+
+# 收盘后K线接口有了当天数据，保存正式K线；之后（如周末）快照仍是同一交易日，不再补临时K线
+delayed.bars_until = None
+closed = quiet(fetcher.fetch_stock_data, '600000', '2024-01-01', today)
+stored = fetcher.store.load_bars('600000')
+assert stored.index[-1] == pd.Timestamp('2024-06-28') and stored.index.is_unique
+delayed.spot_calls = 0
+fetcher.spot.interval = 0
+for _ in range(3):
+    weekend = quiet(fetcher.fetch_stock_data, '600000', '2024-01-01', today)
+assert delayed.spot_calls == 0
+assert weekend.index.equals(closed.index) and weekend['close'].equals(closed['close'])
+assert fetcher.store.load_bars('600000').index.equals(stored.index)
+print("✓ 临时K线不写入本地，已有该交易日的K线时不重复添加，也不下载全市场行情")
+
+print("\n=== 全市场行情快照测试完成 ===")
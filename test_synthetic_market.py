@@ -0,0 +1,39 @@
+import tempfile
+from synthetic_market import SyntheticMarket
+from data_fetcher import DataFetcher
+from technical_indicators import TechnicalIndicators
+from visualizer import Visualizer
+
+# 初始化模块（合成行情，无需联网）
+market = SyntheticMarket(n_symbols=8, seed=1, today='2024-06-28')
+fetcher = DataFetcher(data_dir=tempfile.mkdtemp(), provider=market)
+
+print("\n=== 测试合成行情 ===")
+
+# 同一种子、同一股票的行情完全一致，且与请求的日期范围无关
+other = SyntheticMarket(n_symbols=8, seed=1, today='2024-06-28')
+a = market.stock_zh_a_hist('600000', start_date='20230101', end_date='20231231')
+b = other.stock_zh_a_hist('600000', start_date='20220101', end_date='20231231')
+assert a.equals(b[b['日期'] >= '2023-01-01'].reset_index(drop=True))
+print("✓ 合成行情可复现")
+
+# 涨跌停与K线形态
+for symbol in market.symbols:
+    bars, factors, _ = market._generate(symbol)
+    change = (bars['close'] / bars['prev_close'] - 1).abs()
+    assert change.max() <= market.limit_ratio(symbol) + 0.01
+    assert (bars['high'] >= bars[['open', 'close']].max(axis=1)).all()
+    assert (bars['low'] <= bars[['open', 'close']].min(axis=1)).all()
+    assert len(bars) < len(market.dates)  # 有停牌
+print("✓ 涨跌停、停牌与K线形态正确")
+
+# 完整流程：获取数据 -> 计算指标 -> 绘图
+df = fetcher.fetch_stock_data('300001', '2023-01-01', '2024-06-28')
+raw = fetcher.fetch_stock_data('300001', '2023-01-01', '2024-06-28', adjust='')
+assert df is not None and len(df) == len(raw)
+assert abs(df['close'].iloc[-1] - raw['close'].iloc[-1]) < 1e-9  # 前复权以最新价格为基准
+df = TechnicalIndicators().calculate_all_indicators(df)
+fig = Visualizer().plot_combined_charts(df)
+print("✓ 合成行情完整流程运行成功")
+
+print("\n=== 合成行情测试完成 ===")
@@ -18,5 +18,11 @@ if df is not None:
     print("\n=== 计算技术指标后 ===")
     print(df.columns.tolist())
     print(df.tail())
+    
+    # 计算共享中间量的扩展指标
+    df = ti_calculator.calculate_indicators(df, ['ATR', 'CCI', 'WR', 'DMI', 'STOCHRSI'])
+    
+    print("\n=== 计算扩展指标后 ===")
+    print(df[['ATR', 'CCI', 'WR', 'DMI_PDI', 'DMI_MDI', 'DMI_ADX', 'STOCHRSI_K', 'STOCHRSI_D']].tail())
 else:
     print("获取数据失败")
\ No newline at end of file
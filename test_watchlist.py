@@ -0,0 +1,86 @@
+import io
+import tempfile
+import contextlib
+import numpy as np
+from synthetic_market import SyntheticMarket
+from data_fetcher import DataFetcher
+from composite_index import CompositeBuilder
+from spot_snapshot import SpotSnapshot
+from visualizer import Visualizer
+from watchlist import WatchlistGrid
+
+# 初始化模块（合成行情，无需联网），先把K线缓存到本地
+market = SyntheticMarket(n_symbols=100, today='2024-06-28')
+data_dir = tempfile.mkdtemp()
+fetcher = DataFetcher(data_dir=data_dir, provider=market)
+with contextlib.redirect_stdout(io.StringIO()):
+    for symbol in market.symbols:
+        fetcher.fetch_stock_data(symbol, '2023-06-01', '2024-06-27')
+builder = CompositeBuilder(data_dir=data_dir, provider=market)
+grid = WatchlistGrid(builder)
+visualizer = Visualizer()
+
+print("\n=== 测试自选股看板 ===")
+
+# 首次刷新计算全部股票，100只股票画在一个图表中
+watchlist = market.symbols + ['999999']
+changed = grid.refresh(watchlist)
+tiles = grid.tiles(watchlist)
+assert len(changed) == len(tiles) == len(market.symbols)
+fig = visualizer.plot_watchlist_grid(tiles, cols=10)
+assert len(fig.data) == 6
+print(f"✓ {len(tiles)} 只股票的迷你图合并为 {len(fig.data)} 个trace（{len(fig.to_json()) // 1024} KB）")
+
+# 迷你图数据与逐只计算一致
+symbol = market.symbols[0]
+with contextlib.redirect_stdout(io.StringIO()):
+    df = fetcher.fetch_stock_data(symbol, '2023-06-01', '2024-06-27')
+tile = grid.tiles([symbol])[0]
+# 停牌日沿用停牌前的收盘价和均线
+dates = df.index.union(tile['dates'])
+np.testing.assert_allclose(tile['close'], df['close'].reindex(dates).ffill().reindex(tile['dates']).to_numpy())
+np.testing.assert_allclose(tile['ma'], df['close'].rolling(20).mean().reindex(dates).ffill().reindex(tile['dates']).to_numpy())
+assert abs(tile['change_pct'] - (df['close'].iloc[-1] / df['close'].iloc[-2] - 1) * 100) < 1e-9
+assert 0 <= tile['rsi'] <= 100
+print("✓ 迷你图数据正确")
+
+# 没有涨跌幅的股票用中性颜色，不显示为上涨
+flat = dict(tile, symbol='000000', name='000000', change_pct=np.nan)
+fig = visualizer.plot_watchlist_grid([flat, tile], cols=2)
+labels = [trace for trace in fig.data if trace.mode == 'text'][0]
+assert labels.textfont.color[0] == 'gray' and labels.text[0].endswith('--')
+assert len([trace for trace in fig.data if trace.line.color == 'gray'][0].x) > 0
+print("✓ 没有涨跌幅时显示为中性颜色")
+
+# 数据没有变化时不重新计算
+assert grid.refresh(watchlist) == []
+print("✓ 数据未变化时沿用缓存")
+
+# 只有一只股票的本地数据更新时只重新计算这一只
+bars = builder.store.load_bars(symbol)
+bars.loc[bars.index[-1], 'close'] *= 1.02
+builder.store.save_bars(symbol, bars)
+assert grid.refresh(watchlist) == [symbol]
+print("✓ 只重新计算数据有变化的股票")
+
+# 叠加盘中行情快照：有成交的股票增加当天的迷你图数据
+spot = SpotSnapshot(market)
+quotes = spot.quotes(watchlist)
+grid.refresh(watchlist, quotes=quotes, trade_date=spot.trade_date)
+traded = quotes[quotes['volume'] > 0].index
+tile = grid.tiles([traded[0]])[0]
+assert tile['dates'][-1] == spot.trade_date and tile['close'][-1] == quotes.loc[traded[0], 'close']
+assert tile['name'] == quotes.loc[traded[0], 'name']
+
+# 下一次快照只有一只股票价格变化，只重新计算这一只
+assert grid.refresh(watchlist, quotes=quotes, trade_date=spot.trade_date) == []
+quotes.loc[traded[1], 'close'] *= 1.01
+assert grid.refresh(watchlist, quotes=quotes, trade_date=spot.trade_date) == [traded[1]]
+print("✓ 叠加实时行情，只重新计算价格变化的股票")
+
+# 自选股减少时不再保留
+grid.refresh(watchlist[:10])
+assert len(grid.tiles()) == 10
+print("✓ 移除自选股")
+
+print("\n=== 自选股看板测试完成 ===")
@@ -424,4 +424,163 @@ class Visualizer:
         fig.update_yaxes(title_text='RSI', row=4, col=1, range=[0, 100])
         fig.update_yaxes(title_text='成交量', row=5, col=1)
         
+        return fig
+    
+    def plot_correlation_heatmap(self, matrix, title='相关系数矩阵', kind='corr', reorder=True, max_labels=60):
+        """
+        绘制相关系数（或协方差）矩阵热力图，适合几百只股票的大矩阵
+        
+        参数:
+            matrix: 行列均为股票代码的方阵DataFrame
+            title: 图表标题
+            kind: 'corr' 相关系数，'cov' 协方差
+            reorder: 是否按谱排序重排股票，使相关性高的股票排在一起
+            max_labels: 股票数超过该值时不显示坐标轴标签
+        
+        返回:
+            go.Figure: 热力图
+        """
+        labels = [str(label) for label in matrix.index]
+        values = matrix.to_numpy(dtype=float)
+        
+        # 谱排序：以(1+相关系数)/2为相似度，按拉普拉斯矩阵第二小特征值的特征向量排序
+        if reorder and len(labels) > 2:
+            scale = np.sqrt(np.abs(np.diag(values))) if kind == 'cov' else np.ones(len(labels))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                similarity = (1 + np.nan_to_num(values / np.outer(scale, scale))) / 2
+            laplacian = np.diag(similarity.sum(axis=1)) - similarity
+            _, vectors = np.linalg.eigh(laplacian)
+            order = np.argsort(vectors[:, 1])
+            values = values[np.ix_(order, order)]
+            labels = [labels[i] for i in order]
+        
+        # 相关系数按百分比取整后用int8传给前端，数据量约为浮点数的四分之一；有缺失值时用float32
+        if kind == 'corr' and not np.isnan(values).any():
+            z = np.round(values * 100).astype(np.int8)
+            heatmap = go.Heatmap(z=z, x=labels, y=labels, zmin=-100, zmax=100, colorscale='RdBu_r',
+                                 colorbar=dict(title='相关系数', tickvals=[-100, -50, 0, 50, 100],
+                                               ticktext=['-1', '-0.5', '0', '0.5', '1']),
+                                 hovertemplate='%{y} / %{x}: %{z}%<extra></extra>')
+        else:
+            limit = np.nanmax(np.abs(values)) if kind == 'cov' else 1
+            heatmap = go.Heatmap(z=values.astype(np.float32), x=labels, y=labels, zmin=-limit, zmax=limit,
+                                 colorscale='RdBu_r', hoverongaps=False,
+                                 hovertemplate='%{y} / %{x}: %{z:.4g}<extra></extra>')
+        
+        fig = go.Figure(heatmap)
+        show_labels = len(labels) <= max_labels
+        fig.update_layout(
+            title=title,
+            height=800,
+            width=850,
+            xaxis=dict(showticklabels=show_labels, type='category'),
+            yaxis=dict(showticklabels=show_labels, type='category', autorange='reversed')
+        )
+        
+        return fig
+    
+    def plot_watchlist_grid(self, tiles, cols=5, tile_height=110):
+        """
+        在一个图表中绘制多只股票的迷你图（收盘价与MA20、RSI标记、最新涨跌幅）
+        
+        所有迷你图画在同一坐标系中，按网格平移后合并为少量WebGL折线，
+        股票数增加时图表的trace数量不变，100只股票也只需一个图表。
+        
+        参数:
+            tiles: 迷你图数据列表，每项包含symbol、name、close、ma、rsi、change_pct（见 WatchlistGrid.tiles）
+            cols: 每行的迷你图个数
+            tile_height: 每行的高度（像素）
+        
+        返回:
+            go.Figure: 迷你图网格
+        """
+        rows = max((len(tiles) + cols - 1) // cols, 1)
+        lines = {'up': ([], []), 'down': ([], []), 'flat': ([], []), 'ma': ([], [])}
+        labels = {'x': [], 'y': [], 'text': [], 'color': []}
+        badges = {'x': [], 'y': [], 'text': [], 'color': []}
+        
+        trend_colors = {'up': 'green', 'down': 'red', 'flat': 'gray'}
+        
+        for i, tile in enumerate(tiles):
+            col, row = i % cols, i // cols
+            close = np.asarray(tile['close'], dtype=float)
+            ma = np.asarray(tile['ma'], dtype=float)
+            # 收盘价和均线一起归一化到格子下部的绘图区
+            values = np.concatenate([close, ma])
+            low, high = np.nanmin(values), np.nanmax(values)
+            span = high - low if high > low else 1.0
+            x = col + 0.05 + 0.9 * np.arange(len(close)) / max(len(close) - 1, 1)
+            bottom = -row - 0.9
+            
+            change_pct = tile['change_pct']
+            # 没有涨跌幅（如上市首日、停牌）或平盘时用中性颜色
+            trend = 'up' if change_pct > 0 else 'down' if change_pct < 0 else 'flat'
+            # 各格子的折线之间用NaN断开
+            for key, series in ((trend, close), ('ma', ma)):
+                lines[key][0].append(np.append(x, np.nan))
+                lines[key][1].append(np.append(bottom + 0.6 * (series - low) / span, np.nan))
+            
+            change_text = '--' if np.isnan(change_pct) else f"{change_pct:+.2f}%"
+            name = tile.get('name', tile['symbol'])
+            title = tile['symbol'] if name == tile['symbol'] else f"{tile['symbol']} {name}"
+            labels['x'].append(col + 0.05)
+            labels['y'].append(-row - 0.12)
+            labels['text'].append(f"{title} {change_text}")
+            labels['color'].append(trend_colors[trend])
+            
+            rsi = tile['rsi']
+            badges['x'].append(col + 0.95)
+            badges['y'].append(-row - 0.12)
+            badges['text'].append('RSI --' if np.isnan(rsi) else f"RSI {rsi:.0f}")
+            badges['color'].append('red' if rsi > 70 else 'green' if rsi < 30 else 'gray')
+        
+        fig = go.Figure()
+        for key, color, width in (('up', 'green', 1.5), ('down', 'red', 1.5), ('flat', 'gray', 1.5), ('ma', 'orange', 1)):
+            fig.add_trace(go.Scattergl(
+                x=np.concatenate(lines[key][0]).astype(np.float32) if lines[key][0] else [],
+                y=np.concatenate(lines[key][1]).astype(np.float32) if lines[key][1] else [],
+                mode='lines',
+                line=dict(color=color, width=width),
+                hoverinfo='skip',
+                connectgaps=False
+            ))
+        
+        fig.add_trace(go.Scatter(
+            x=labels['x'],
+            y=labels['y'],
+            mode='text',
+            text=labels['text'],
+            textposition='middle right',
+            textfont=dict(color=labels['color'], size=12),
+            hoverinfo='skip'
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=badges['x'],
+            y=badges['y'],
+            mode='text',
+            text=badges['text'],
+            textposition='middle left',
+            textfont=dict(color=badges['color'], size=11),
+            hoverinfo='skip'
+        ))
+        
+        # 格子分隔线
+        separators = [dict(type='line', x0=0, x1=cols, y0=-r, y1=-r, line=dict(color='lightgray', width=1))
+                      for r in range(1, rows)]
+        separators += [dict(type='line', x0=c, x1=c, y0=0, y1=-rows, line=dict(color='lightgray', width=1))
+                       for c in range(1, cols)]
+        
+        fig.update_layout(
+            height=rows * tile_height + 40,
+            margin=dict(l=10, r=10, t=20, b=10),
+            showlegend=False,
+            shapes=separators,
+            xaxis=dict(range=[0, cols], visible=False, fixedrange=True),
+            yaxis=dict(range=[-rows, 0], visible=False, fixedrange=True),
+            plot_bgcolor='white',
+            # 刷新数据时保留页面上的交互状态
+            uirevision='watchlist'
+        )
+        
         return fig
\ No newline at end of file
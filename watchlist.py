@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import talib
+
+
+class WatchlistGrid:
+    """
+    自选股看板的迷你图数据
+
+    收盘价从本地缓存批量读取（CompositeBuilder 的共享面板，只重新读取文件有更新的股票），
+    可再叠加全市场行情快照中当天的最新价。每只股票缓存一份迷你图数据（收盘价、MA20、RSI、最新涨跌幅），
+    刷新时只重新计算数据有变化的股票，其余沿用缓存。
+    """
+
+    def __init__(self, builder, bars=60, warmup=100, ma_period=20, rsi_period=14):
+        """
+        参数:
+            builder: CompositeBuilder实例（提供本地缓存的收盘价面板）
+            bars: 每个迷你图显示的K线数
+            warmup: 额外读取的K线数，用于均线和RSI预热
+            ma_period: 均线周期
+            rsi_period: RSI周期
+        """
+        self.builder = builder
+        self.bars = bars
+        self.warmup = warmup
+        self.ma_period = ma_period
+        self.rsi_period = rsi_period
+        self._tiles = {}
+
+    def refresh(self, symbols, quotes=None, trade_date=None):
+        """
+        按最新数据更新迷你图
+
+        参数:
+            symbols: 股票代码列表
+            quotes: SpotSnapshot.quotes(symbols) 的结果，可选；有成交的股票用其最新价作为当天的收盘价
+            trade_date: 快照对应的交易日期（SpotSnapshot.trade_date），提供quotes时必须提供
+
+        返回:
+            list: 本次重新计算的股票代码
+        """
+        symbols = list(dict.fromkeys(symbols))
+        closes = self.builder.get_panel(symbols, 'close')
+        if quotes is not None and not closes.empty:
+            closes = self._apply_quotes(closes, quotes, pd.Timestamp(trade_date))
+        window = closes.iloc[-(self.bars + self.warmup):]
+
+        changed = []
+        for symbol in window.columns:
+            values = window[symbol].to_numpy(dtype=float)
+            tile = self._tiles.get(symbol)
+            if tile is not None and tile['dates'][-1] == window.index[-1] and np.array_equal(tile['source'], values,
+                                                                                            equal_nan=True):
+                continue
+            changed.append(symbol)
+        if changed:
+            self._compute(window[changed], quotes)
+
+        # 不在自选股中的股票不再保留
+        for symbol in list(self._tiles):
+            if symbol not in symbols:
+                del self._tiles[symbol]
+        return changed
+
+    def _apply_quotes(self, closes, quotes, trade_date):
+        traded = quotes.reindex(closes.columns)
+        traded = traded[traded['volume'] > 0]['close']
+        if traded.empty:
+            return closes
+        if trade_date not in closes.index:
+            closes = pd.concat([closes, pd.DataFrame(index=pd.DatetimeIndex([trade_date], name='date'))])
+            closes = closes.sort_index()
+        closes.loc[trade_date, traded.index] = traded.to_numpy()
+        return closes
+
+    def _compute(self, window, quotes):
+        shown = slice(-self.bars, None)
+        for symbol in window.columns:
+            values = window[symbol].to_numpy(dtype=float)
+            # 均线和RSI只用有成交的K线计算（与个股分析一致），停牌日沿用停牌前的值
+            valid = ~np.isnan(values)
+            traded = values[valid]
+            ma = np.full(len(values), np.nan)
+            ma[valid] = pd.Series(traded).rolling(self.ma_period).mean().to_numpy()
+            rsi = np.nan
+            if len(traded) > self.rsi_period:
+                rsi = talib.RSI(traded, timeperiod=self.rsi_period)[-1]
+            change_pct = np.nan
+            if len(traded) >= 2 and traded[-2] > 0:
+                change_pct = (traded[-1] / traded[-2] - 1) * 100
+            name = symbol
+            if quotes is not None and symbol in quotes.index and isinstance(quotes.loc[symbol, 'name'], str):
+                name = quotes.loc[symbol, 'name']
+            self._tiles[symbol] = {
+                'symbol': symbol,
+                'name': name,
+                'dates': window.index[shown],
+                'close': pd.Series(values).ffill().to_numpy()[shown],
+                'ma': pd.Series(ma).ffill().to_numpy()[shown],
+                'rsi': rsi,
+                'change_pct': change_pct,
+                'source': values,
+            }
+
+    def tiles(self, symbols=None):
+        """
+        按自选股顺序返回迷你图数据，本地没有数据的股票不包含在内
+
+        返回:
+            list: 每只股票的迷你图数据（symbol、name、dates、close、ma、rsi、change_pct）
+        """
+        symbols = list(self._tiles) if symbols is None else symbols
+        return [self._tiles[symbol] for symbol in symbols if symbol in self._tiles]